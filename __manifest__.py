@@ -2,7 +2,7 @@
 {
     "name": "SGA Property Rental",
     "summary": "Gestión de alquileres para Inmobiliaria Emanuel",
-    "version": "1.0",
+    "version": "1.3",
     "author": "Jorge Maidana",
     "website": "",
     "category": "Custom",
@@ -12,6 +12,7 @@
         "account",
         "sale",
         "contacts",
+        "mail",
         "website_sale",
     ],
     "data": [
@@ -29,9 +30,20 @@
         "views/report_account_views.xml",
         "views/invoice_report_wizard_views.xml",
         "views/menu.xml",
+        "views/inventory_import_wizard_views.xml",
+        "views/contract_import_wizard_views.xml",
+        "views/occupancy_report_views.xml",
+        "views/arrears_views.xml",
+        "views/contract_due_views.xml",
+        "views/rent_indexation_views.xml",
+        "views/owner_settlement_views.xml",
+        "views/perf_sample_views.xml",
         "views/contract_report.xml",
         "views/schedule_client_views.xml",
         "views/website_product_extra_button.xml",
+        "views/rental_visit_template.xml",
+        "views/website_shop_availability.xml",
+        "views/property_catalog_templates.xml",
     ],
     "installable": True,
     "application": True,
@@ -1 +1,5 @@
-from . import portal_visits
\ No newline at end of file
+from . import portal_visits
+from . import contract_import_api
+from . import property_catalog
+from . import agent_calendar_api
+from . import website_sale_availability
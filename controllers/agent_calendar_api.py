@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+from odoo.addons.sga_property_rental.models.perf_sample import perf_sampled
+
+
+class RentalAgentCalendarApi(http.Controller):
+
+    @http.route('/rental/api/agent-calendar', type='json', auth='user', methods=['POST'])
+    @perf_sampled("api_agent_calendar")
+    def agent_calendar(self, date_from, date_to, agent_ids=None):
+        """Ocupación por agente y día; ver rental.visit.slot.get_agent_calendar().
+
+        Las claves de agente se devuelven como texto (JSON no admite enteros).
+        """
+        calendar = request.env["rental.visit.slot"].get_agent_calendar(date_from, date_to, agent_ids)
+        return {str(agent_id): data for agent_id, data in calendar.items()}
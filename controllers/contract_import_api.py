@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+from odoo.addons.sga_property_rental.models.perf_sample import perf_sampled
+
+
+class RentalContractImportApi(http.Controller):
+
+    @http.route('/rental/api/contracts/import', type='json', auth='user', methods=['POST'])
+    @perf_sampled("api_contract_import")
+    def import_contracts(self, contracts, load_clauses=True, skip_errors=False):
+        """Alta masiva de contratos para migraciones e integraciones.
+
+        `contracts` es una lista de dicts con las mismas columnas que el CSV
+        (property, tenant, agent, start_date, rent_amount, ...). Devuelve los
+        ids creados y los errores por fila; sin skip_errors no se crea nada
+        mientras haya alguna fila con error.
+        """
+        if not isinstance(contracts, list) or not all(isinstance(row, dict) for row in contracts):
+            return {"contract_ids": [], "errors": ["'contracts' debe ser una lista de objetos"]}
+        return request.env["rental.contract"].import_contracts(
+            contracts, load_clauses=bool(load_clauses), skip_errors=bool(skip_errors)
+        )
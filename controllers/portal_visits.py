@@ -6,6 +6,19 @@ import pytz
 from odoo import http, _, fields
 from odoo.http import request
 
+from odoo.addons.sga_property_rental.models.perf_sample import perf_sampled
+from odoo.addons.sga_property_rental.models.property import visit_page_cache
+
+EMPTY_FORM = {
+    "name": "",
+    "email": "",
+    "phone": "",
+    "note": "",
+    "slot_id": "",
+    "visit_start_time": "",
+    "visit_end_time": "",
+}
+
 
 class PortalRentalVisits(http.Controller):
 
@@ -16,45 +29,33 @@ class PortalRentalVisits(http.Controller):
         website=True,
         methods=['GET', 'POST'],
     )
+    @perf_sampled("portal_schedule_visit")
     def portal_schedule_visit(self, product_id, **post):
         env = request.env
-
-        # ========= Producto =========
-        Product = env["product.template"].sudo()
-        product = Product.browse(product_id)
-        if not product.exists():
+        is_public = env.user._is_public()
+
+        # Visitantes anónimos sin envío: datos y fragmentos desde la caché
+        if is_public and request.httprequest.method == "GET":
+            page = self._get_cached_visit_page(product_id)
+            if page is None:
+                return request.not_found()
+            return request.render("sga_property_rental.rental_visit_template", {
+                "product": env["product.template"].sudo().browse(page["product_id"]),
+                "property": env["rental.property"].sudo().browse(page["property_id"]),
+                "has_slots": page["has_slots"],
+                "fragments": page["fragments"],
+                "is_public": is_public,
+                "message": "",
+                "errors": [],
+                "form": dict(EMPTY_FORM),
+            })
+
+        product, property_rec, slots = self._load_visit_records(product_id)
+        if not product:
             return request.not_found()
-
-        # ========= Propiedad vinculada =========
-        Property = env["rental.property"].sudo()
-        fields_prop = Property._fields
-        domain = []
-
-        if "product_id" in fields_prop and "product_tmpl_id" in fields_prop:
-            domain = ["|", ("product_id", "=", product_id), ("product_tmpl_id", "=", product_id)]
-        elif "product_id" in fields_prop:
-            domain = [("product_id", "=", product_id)]
-        elif "product_tmpl_id" in fields_prop:
-            domain = [("product_tmpl_id", "=", product_id)]
-
-        if domain:
-            property_rec = Property.search(domain, limit=1)
-        else:
-            property_rec = Property.search([], limit=1)
-
-        # ========= Franjas =========
         Slot = env["rental.visit.slot"].sudo()
-        if property_rec:
-            slots = Slot.search(
-                [("property_id", "=", property_rec.id), ("state", "=", "available")],
-                order="start_datetime",
-            )
-        else:
-            slots = Slot.browse()
 
         # ========= Lógica de formulario =========
-        is_public = request.env.user == request.env.ref("base.public_user")
-
         message = ""
         errors = []
 
@@ -75,7 +76,11 @@ class PortalRentalVisits(http.Controller):
 
             slot = Slot.browse(slot_id) if slot_id else Slot.browse()
 
-            if not slot_id or not slot or not slot.exists():
+            # Una página vieja puede ofrecer una franja ya tomada o de otra propiedad
+            if (
+                not slot_id or not slot or not slot.exists()
+                or slot.state != "available" or slot.property_id != property_rec
+            ):
                 errors.append(_("Debe seleccionar una franja horaria válida."))
 
             if not start_time_str or not end_time_str:
@@ -168,23 +173,88 @@ class PortalRentalVisits(http.Controller):
                     "Tu solicitud de visita fue enviada correctamente. "
                     "Un agente la confirmará en breve."
                 )
-                form_vals = {
-                    "name": "",
-                    "email": "",
-                    "phone": "",
-                    "note": "",
-                    "slot_id": "",
-                    "visit_start_time": "",
-                    "visit_end_time": "",
-                }
+                form_vals = dict(EMPTY_FORM)
 
         values = {
             "product": product,
             "property": property_rec,
-            "slots": slots,
+            "has_slots": bool(slots),
+            "fragments": self._render_visit_fragments(product, property_rec, slots, form_vals),
             "is_public": is_public,
             "message": message,
             "errors": errors,
             "form": form_vals,
         }
         return request.render("sga_property_rental.rental_visit_template", values)
+
+    def _load_visit_records(self, product_id):
+        """Producto, propiedad vinculada y franjas disponibles de la página."""
+        env = request.env
+        product = env["product.template"].sudo().browse(product_id).exists()
+
+        # ========= Propiedad vinculada =========
+        Property = env["rental.property"].sudo()
+        fields_prop = Property._fields
+        domain = []
+
+        if "product_id" in fields_prop and "product_tmpl_id" in fields_prop:
+            domain = ["|", ("product_id", "=", product_id), ("product_tmpl_id", "=", product_id)]
+        elif "product_id" in fields_prop:
+            domain = [("product_id", "=", product_id)]
+        elif "product_tmpl_id" in fields_prop:
+            domain = [("product_tmpl_id", "=", product_id)]
+
+        if not product:
+            property_rec = Property.browse()
+        elif domain:
+            property_rec = Property.search(domain, limit=1)
+        else:
+            property_rec = Property.search([], limit=1)
+
+        # ========= Franjas =========
+        Slot = env["rental.visit.slot"].sudo()
+        if property_rec:
+            slots = Slot.search(
+                [("property_id", "=", property_rec.id), ("state", "=", "available")],
+                order="start_datetime",
+            )
+        else:
+            slots = Slot.browse()
+        return product, property_rec, slots
+
+    def _render_visit_fragments(self, product, property_rec, slots, form):
+        """Partes de la página que no dependen del visitante, ya renderizadas."""
+        IrQweb = request.env["ir.qweb"]
+        values = {"product": product, "property": property_rec, "slots": slots, "form": form}
+        return {
+            "header": IrQweb._render("sga_property_rental.rental_visit_header", values),
+            "slots": IrQweb._render("sga_property_rental.rental_visit_slot_fields", values),
+        }
+
+    def _get_cached_visit_page(self, product_id):
+        """Página de un producto para visitantes anónimos; None si no existe.
+
+        La clave lleva la versión de la página (producto, propiedad y sus
+        franjas, ver _visit_page_version), así que ningún worker sirve un
+        listado con franjas ya tomadas o bloqueadas. Además, al confirmarse
+        una transacción que toca franjas, propiedades o el producto, este
+        worker descarta esas páginas (ver invalidate_visit_pages).
+        """
+        version = request.env["rental.property"].sudo()._visit_page_version(product_id)
+        if version is None:
+            return None
+        dbname = request.env.cr.dbname
+        key = (product_id, request.env.lang, request.env.context.get("tz"), version)
+        page = visit_page_cache.get(dbname, key)
+        if page is None:
+            product, property_rec, slots = self._load_visit_records(product_id)
+            if not product:
+                return None
+            page = {
+                "product_id": product.id,
+                "property_id": property_rec.id,
+                "has_slots": bool(slots),
+                "fragments": self._render_visit_fragments(product, property_rec, slots, EMPTY_FORM),
+            }
+            visit_page_cache.set(dbname, key, page)
+        return page
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from werkzeug.urls import url_encode
+
+from odoo import http
+from odoo.http import request
+from odoo.tools.image import image_data_uri
+
+from odoo.addons.sga_property_rental.models.perf_sample import perf_sampled
+
+
+class RentalPropertyCatalog(http.Controller):
+
+    # Parámetros de la URL -> filtros de rental.property._catalog_where()
+    INT_FILTERS = ("type_id", "city_id", "price_bucket")
+    CHAR_FILTERS = ("rental_type", "zone_type")
+
+    def _parse_filters(self, params):
+        Property = request.env["rental.property"]
+        filters = {}
+        for name in self.INT_FILTERS:
+            value = params.get(name) or ""
+            if value.isdigit():
+                filters[name] = int(value)
+        for name in self.CHAR_FILTERS:
+            value = params.get(name)
+            if value and value in dict(Property._fields[name].selection):
+                filters[name] = value
+        return filters
+
+    @http.route(['/rental/propiedades'], type='http', auth='public', website=True, methods=['GET'])
+    @perf_sampled("portal_property_catalog")
+    def property_catalog(self, **params):
+        Property = request.env["rental.property"].sudo()
+        filters = self._parse_filters(params)
+        after = params.get("after") or ""
+        after = int(after) if after.isdigit() else None
+
+        properties, has_more = Property._search_catalog(filters, after=after)
+        facets = Property._get_catalog_facets(filters)
+
+        def catalog_url(**changes):
+            """URL con los filtros actuales más `changes` (None quita el filtro)."""
+            query = dict(filters, **changes)
+            return "/rental/propiedades?%s" % url_encode({k: v for k, v in query.items() if v is not None})
+
+        values = {
+            "properties": properties,
+            "facets": facets,
+            "filters": filters,
+            "catalog_url": catalog_url,
+            "next_url": catalog_url(after=properties[-1].id) if has_more else False,
+            "is_first_page": after is None,
+            # El público no tiene acceso a /web/image de rental.property
+            "image_data_uri": image_data_uri,
+        }
+        return request.render("sga_property_rental.property_catalog_template", values)
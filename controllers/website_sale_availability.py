@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+from odoo.addons.website_sale.controllers.main import WebsiteSale
+from odoo.addons.sga_property_rental.models.property import shop_availability_cache
+
+
+class RentalWebsiteSale(WebsiteSale):
+
+    @http.route()
+    def shop(self, page=0, category=None, search='', min_price=0.0, max_price=0.0, ppg=False, **post):
+        response = super().shop(
+            page=page, category=category, search=search, min_price=min_price, max_price=max_price, ppg=ppg, **post
+        )
+        qcontext = getattr(response, "qcontext", None)
+        if qcontext is not None and qcontext.get("products"):
+            qcontext["rental_availability"] = self._get_rental_availability(qcontext["products"].ids)
+        return response
+
+    def _get_rental_availability(self, product_tmpl_ids):
+        """Etiquetas de disponibilidad de la página; cacheadas para visitantes anónimos."""
+        Property = request.env["rental.property"].sudo()
+        if not request.env.user._is_public():
+            return Property._get_shop_availability(product_tmpl_ids)
+
+        dbname = request.env.cr.dbname
+        key = (tuple(sorted(product_tmpl_ids)), request.env.lang, request.env.context.get("tz"))
+        availability = shop_availability_cache.get(dbname, key)
+        if availability is None:
+            availability = Property._get_shop_availability(product_tmpl_ids)
+            shop_availability_cache.set(dbname, key, availability)
+        return availability
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Marca las líneas existentes como generadas con la versión actual de su plantilla.
+
+    rendered_hash nace vacío; sin esto el cron de cláusulas desactualizadas
+    tomaría todas las líneas del sistema como pendientes en su primera corrida.
+    """
+    cr.execute("""
+        UPDATE rental_contract_clause_line l
+           SET rendered_hash = t.body_hash
+          FROM rental_clause t
+         WHERE t.id = l.template_id
+           AND l.rendered_hash IS NULL
+    """)
+    _logger.info("rental.contract.clause.line: %s líneas con rendered_hash inicial", cr.rowcount)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import SUPERUSER_ID, api
+from odoo.tools import split_every
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Pasa rental_contract_clause_line.body a rental.clause.body (uno por contenido).
+
+    Los textos pasan por RentalClauseBody._find_or_create, igual que al
+    guardar desde el ORM: mismo saneado y mismo hash, así un texto migrado y
+    uno escrito después con el mismo contenido comparten fila.
+    """
+    cr.execute("""
+        SELECT 1 FROM information_schema.columns
+         WHERE table_name = 'rental_contract_clause_line' AND column_name = 'body'
+    """)
+    if not cr.fetchone():
+        return
+
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    ClauseBody = env["rental.clause.body"]
+    cr.execute("SELECT DISTINCT body FROM rental_contract_clause_line WHERE body IS NOT NULL AND body != ''")
+    linked = 0
+    for bodies in split_every(1000, [row[0] for row in cr.fetchall()], list):
+        body_ids = ClauseBody._find_or_create(bodies)
+        cr.execute("""
+            UPDATE rental_contract_clause_line l
+               SET body_id = t.body_id
+              FROM unnest(%s::text[], %s::int[]) AS t(body, body_id)
+             WHERE l.body = t.body
+        """, [bodies, [body_id or None for body_id in body_ids]])
+        linked += cr.rowcount
+    _logger.info("rental.contract.clause.line: %s líneas enlazadas a rental.clause.body", linked)
+
+    cr.execute("ALTER TABLE rental_contract_clause_line DROP COLUMN body")
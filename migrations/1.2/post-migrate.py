@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    """Carga next_due_date de los contratos existentes."""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["rental.contract"]._refresh_next_due_date()
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Toma el texto actual de cada línea como el generado desde su plantilla.
+
+    rendered_body_hash nace vacío; sin historial no se puede saber qué líneas
+    se editaron a mano antes de esta versión, así que se parte del texto
+    actual y las ediciones se detectan desde ahora.
+    """
+    cr.execute("""
+        UPDATE rental_contract_clause_line l
+           SET rendered_body_hash = b.content_hash
+          FROM rental_clause_body b
+         WHERE b.id = l.body_id
+           AND l.template_id IS NOT NULL
+           AND l.rendered_body_hash IS NULL
+    """)
+    _logger.info("rental.contract.clause.line: %s líneas con rendered_body_hash inicial", cr.rowcount)
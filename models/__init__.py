@@ -4,4 +4,13 @@ from . import visit
 from . import account_move_inherit
 from . import clause
 #from . import report
-# from . import schedule_client
\ No newline at end of file
+# from . import schedule_client
+from . import read_replica
+from . import occupancy_report
+from . import arrears
+from . import rent_indexation
+from . import owner_settlement
+from . import perf_sample
+from . import ir_actions_report
+from . import ir_sequence
+from . import product_template
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from odoo import fields, models
+from odoo import api, fields, models
 
 class AccountMove(models.Model):
     _inherit = "account.move"
@@ -7,3 +7,53 @@ class AccountMove(models.Model):
     rental_property_id = fields.Many2one("rental.property", "Propiedad")
     rental_contract_id = fields.Many2one("rental.contract", "Contrato (alquiler)")
     rental_contract_vendor_id = fields.Many2one("rental.contract", "Contrato (proveedor)")
+    rental_invoice_kind = fields.Selection(
+        [("deposit", "Depósito"), ("rent", "Alquiler"), ("penalty", "Multa")],
+        string="Concepto (alquiler)",
+        copy=False,
+    )
+    rental_period = fields.Char("Período (AAAA-MM)", copy=False, index=True)
+    rental_penalty_billed_until = fields.Date(
+        "Multa facturada hasta",
+        copy=False,
+        help="Último día de atraso de esta factura ya incluido en una factura de multa.",
+    )
+
+    def init(self):
+        # Una sola multa (no cancelada) por contrato y período
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS account_move_rental_penalty_period_uniq
+                ON account_move (rental_contract_id, rental_period)
+             WHERE rental_invoice_kind = 'penalty' AND state != 'cancel'
+        """)
+
+    def write(self, vals):
+        res = super().write(vals)
+        # Publicar / pasar a borrador / cancelar cambia la deuda del contrato
+        if "state" in vals:
+            contracts = self.rental_contract_id
+            if contracts:
+                contracts._schedule_payment_status_refresh()
+        return res
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = "account.partial.reconcile"
+
+    def _get_rental_contracts(self):
+        return (self.debit_move_id.move_id | self.credit_move_id.move_id).rental_contract_id
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        partials = super().create(vals_list)
+        contracts = partials._get_rental_contracts()
+        if contracts:
+            contracts._schedule_payment_status_refresh()
+        return partials
+
+    def unlink(self):
+        contracts = self._get_rental_contracts()
+        res = super().unlink()
+        if contracts:
+            contracts._schedule_payment_status_refresh()
+        return res
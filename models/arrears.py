@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+
+from .contract import RENT_DUE_DATE_SQL
+
+
+class RentalArrearsSnapshot(models.Model):
+    """Saldo pendiente por contrato, separado por antigüedad.
+
+    Una fila por contrato con deuda. Se calcula con una sola consulta
+    agrupada sobre account_move y se mantiene al día al conciliar pagos
+    (ver account_move_inherit.py) y con el cron nocturno, que corre los
+    tramos a medida que pasan los días.
+    """
+    _name = "rental.arrears.snapshot"
+    _inherit = ["rental.read.replica.mixin"]
+    _description = "Morosidad por contrato"
+    _order = "amount_total desc"
+    _rec_name = "contract_id"
+
+    contract_id = fields.Many2one("rental.contract", "Contrato", readonly=True, index=True, ondelete="cascade")
+    tenant_id = fields.Many2one("res.partner", "Inquilino", readonly=True)
+    property_id = fields.Many2one("rental.property", "Propiedad", readonly=True)
+    owner_id = fields.Many2one("res.partner", "Propietario", readonly=True)
+    agent_id = fields.Many2one("res.partner", "Agente Inmobiliario", readonly=True)
+    currency_id = fields.Many2one("res.currency", "Moneda", readonly=True)
+
+    amount_not_due = fields.Monetary("No vencido", currency_field="currency_id", readonly=True)
+    amount_0_30 = fields.Monetary("0-30 días", currency_field="currency_id", readonly=True)
+    amount_31_60 = fields.Monetary("31-60 días", currency_field="currency_id", readonly=True)
+    amount_61_90 = fields.Monetary("61-90 días", currency_field="currency_id", readonly=True)
+    amount_90_plus = fields.Monetary("Más de 90 días", currency_field="currency_id", readonly=True)
+    amount_total = fields.Monetary("Total pendiente", currency_field="currency_id", readonly=True)
+    invoice_count = fields.Integer("Facturas pendientes", readonly=True)
+    oldest_due_date = fields.Date("Vencimiento más antiguo", readonly=True)
+    days_overdue = fields.Integer("Días de atraso", readonly=True, aggregator="max")
+    refreshed_at = fields.Datetime("Actualizado", readonly=True)
+
+    _sql_constraints = [
+        ("contract_uniq", "UNIQUE(contract_id)", "Ya existe un registro de morosidad para este contrato."),
+    ]
+
+    @api.model
+    def _refresh(self, contract_ids=None):
+        """Recalcula los saldos de los contratos dados (todos si None)."""
+        self.env.flush_all()
+        params = {
+            "ids": list(contract_ids) if contract_ids is not None else None,
+            "today": fields.Date.context_today(self),
+            "uid": self.env.uid,
+        }
+        self.env.cr.execute("""
+            DELETE FROM rental_arrears_snapshot
+             WHERE %(ids)s::int[] IS NULL OR contract_id = ANY(%(ids)s::int[])
+        """, params)
+        self.env.cr.execute("""
+            WITH pending AS (
+                SELECT c.id AS contract_id,
+                       m.amount_residual AS residual,
+                       %(today)s::date - ({due}) AS days
+                  FROM account_move m
+                  JOIN rental_contract c ON c.id = m.rental_contract_id
+                 WHERE m.move_type = 'out_invoice'
+                   AND m.state = 'posted'
+                   AND m.payment_state IN ('not_paid', 'partial')
+                   AND m.amount_residual > 0
+                   AND (%(ids)s::int[] IS NULL OR c.id = ANY(%(ids)s::int[]))
+            )
+            INSERT INTO rental_arrears_snapshot (
+                   contract_id, tenant_id, property_id, owner_id, agent_id, currency_id,
+                   amount_not_due, amount_0_30, amount_31_60, amount_61_90, amount_90_plus,
+                   amount_total, invoice_count, oldest_due_date, days_overdue, refreshed_at,
+                   create_uid, create_date, write_uid, write_date)
+            SELECT c.id, c.tenant_id, c.property_id, p.owner_id, c.agent_id, c.currency_id,
+                   COALESCE(SUM(pe.residual) FILTER (WHERE pe.days < 0), 0),
+                   COALESCE(SUM(pe.residual) FILTER (WHERE pe.days BETWEEN 0 AND 30), 0),
+                   COALESCE(SUM(pe.residual) FILTER (WHERE pe.days BETWEEN 31 AND 60), 0),
+                   COALESCE(SUM(pe.residual) FILTER (WHERE pe.days BETWEEN 61 AND 90), 0),
+                   COALESCE(SUM(pe.residual) FILTER (WHERE pe.days > 90), 0),
+                   SUM(pe.residual),
+                   COUNT(*),
+                   %(today)s::date - MAX(pe.days),
+                   GREATEST(MAX(pe.days), 0),
+                   now() at time zone 'UTC',
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM pending pe
+              JOIN rental_contract c ON c.id = pe.contract_id
+              JOIN rental_property p ON p.id = c.property_id
+             GROUP BY c.id, p.owner_id
+        """.format(due=RENT_DUE_DATE_SQL), params)
+        self.invalidate_model()
+
+    @api.model
+    def cron_refresh_arrears(self):
+        """Recalcula todo: los tramos de antigüedad cambian con la fecha."""
+        self._refresh()
+        return True
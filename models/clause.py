@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields
+import hashlib
+
+from datetime import timedelta
+
+from odoo import api, models, fields
 
 class RentalClause(models.Model):
     _name = "rental.clause"
@@ -12,3 +16,114 @@ class RentalClause(models.Model):
     is_default = fields.Boolean("Seleccionada por defecto", default=False)
     is_editable = fields.Boolean("Permitir edición al usar", default=True)
     active = fields.Boolean(default=True)
+    # Cambia con cada edición del contenido; las líneas guardan con cuál se generaron
+    body_hash = fields.Char("Versión del contenido", compute="_compute_body_hash", store=True)
+
+    @api.depends("body")
+    def _compute_body_hash(self):
+        for clause in self:
+            clause.body_hash = hashlib.sha1((clause.body or "").encode()).hexdigest()
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "body" in vals:
+            # Las líneas de contrato se actualizan en segundo plano
+            self.env.ref("sga_property_rental.ir_cron_refresh_stale_clauses")._trigger()
+        return res
+
+
+class RentalClauseBody(models.Model):
+    _name = "rental.clause.body"
+    _description = "Texto de cláusula (almacenado por contenido)"
+    _rec_name = "content_hash"
+
+    content_hash = fields.Char("Hash del contenido", required=True, readonly=True)
+    body = fields.Html("Contenido", sanitize=True, readonly=True)
+    ref_count = fields.Integer("Líneas que lo usan", compute="_compute_ref_count")
+
+    _sql_constraints = [
+        ("content_hash_uniq", "unique(content_hash)", "El contenido ya está almacenado."),
+    ]
+
+    def _compute_ref_count(self):
+        counts = dict(self.env["rental.contract.clause.line"]._read_group(
+            [("body_id", "in", self.ids)], ["body_id"], ["__count"]
+        ))
+        for rec in self:
+            rec.ref_count = counts.get(rec, 0)
+
+    @api.model
+    def _content_hash(self, content):
+        """sha256 del HTML ya saneado, tal como queda guardado en body."""
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    @api.model
+    def _sanitized_hash(self, content):
+        """Hash con el que quedaría guardado `content` (False si queda vacío)."""
+        sanitized = self._fields["body"].convert_to_column(content, self) if content else None
+        return self._content_hash(sanitized) if sanitized else False
+
+    @api.model
+    def _find_or_create(self, contents):
+        """Devuelve el id de cuerpo para cada contenido (False si está vacío).
+
+        Se sanea cada contenido y se hashea el resultado, así dos textos que
+        quedan iguales tras el saneado comparten fila. Busca todos los hashes
+        con una consulta e inserta los faltantes con otra; ON CONFLICT cubre
+        a otra transacción que inserte el mismo contenido a la vez.
+        """
+        # El INSERT directo saltea el ORM: los permisos se validan aquí
+        self.check_access("create")
+        field = self._fields["body"]
+        sanitized = [field.convert_to_column(c, self) if c else None for c in contents]
+        hashes = [self._content_hash(c) if c else False for c in sanitized]
+        by_hash = {h: c for h, c in zip(hashes, sanitized) if h}
+        if not by_hash:
+            return hashes
+
+        self.env.cr.execute(
+            "SELECT content_hash, id FROM rental_clause_body WHERE content_hash = ANY(%s)", [list(by_hash)]
+        )
+        ids = dict(self.env.cr.fetchall())
+        new = [h for h in by_hash if h not in ids]
+        if new:
+            self.env.cr.execute("""
+                INSERT INTO rental_clause_body (content_hash, body, create_uid, create_date, write_uid, write_date)
+                SELECT h, b, %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+                  FROM unnest(%(hashes)s::varchar[], %(bodies)s::text[]) AS t(h, b)
+                ON CONFLICT (content_hash) DO NOTHING
+                RETURNING content_hash, id
+            """, {
+                "uid": self.env.uid,
+                "hashes": new,
+                "bodies": [by_hash[h] for h in new],
+            })
+            ids.update(self.env.cr.fetchall())
+            raced = [h for h in new if h not in ids]
+            if raced:
+                self.env.cr.execute(
+                    "SELECT content_hash, id FROM rental_clause_body WHERE content_hash = ANY(%s)", [raced]
+                )
+                ids.update(self.env.cr.fetchall())
+        return [ids[h] if h else False for h in hashes]
+
+    @api.model
+    def cron_gc_unreferenced(self, min_age_days=1):
+        """Borra los textos que ya no usa ninguna línea.
+
+        Los recién creados se respetan (pueden pertenecer a una transacción en
+        curso) y SKIP LOCKED saltea los que otra transacción está referenciando.
+        """
+        self.env["rental.contract.clause.line"].flush_model(["body_id"])
+        self.env.cr.execute("""
+            DELETE FROM rental_clause_body
+             WHERE id IN (
+                    SELECT b.id FROM rental_clause_body b
+                     WHERE b.create_date < %s
+                       AND NOT EXISTS (SELECT 1 FROM rental_contract_clause_line l WHERE l.body_id = b.id)
+                       FOR UPDATE SKIP LOCKED
+                   )
+        """, [fields.Datetime.now() - timedelta(days=min_age_days)])
+        deleted = self.env.cr.rowcount
+        self.invalidate_model()
+        return deleted
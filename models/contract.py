@@ -1,11 +1,39 @@
 # -*- coding: utf-8 -*-
+from collections import defaultdict
 from datetime import date
 from dateutil.relativedelta import relativedelta
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
-from odoo.tools import html2plaintext
+from odoo.tools import html2plaintext, split_every
 from num2words import num2words
 
+from .perf_sample import perf_sampled
+
+# Fecha de vencimiento de una factura de alquiler, en SQL (alias m = account_move,
+# c = rental_contract). Mismo criterio que RentalContract._next_period_invoice_date:
+# el día day_due del mes de la factura, o del mes siguiente si ya pasó.
+RENT_DUE_DATE_SQL = """
+    CASE WHEN EXTRACT(DAY FROM m.invoice_date) <= c.day_due
+         THEN make_date(EXTRACT(YEAR FROM m.invoice_date)::int,
+                        EXTRACT(MONTH FROM m.invoice_date)::int, c.day_due)
+         ELSE (make_date(EXTRACT(YEAR FROM m.invoice_date)::int,
+                         EXTRACT(MONTH FROM m.invoice_date)::int, c.day_due)
+               + interval '1 month')::date
+    END
+"""
+
+# Facturas de multa por create() en la corrida nocturna
+PENALTY_BATCH_SIZE = 200
+# Contratos por create() en la importación masiva
+IMPORT_BATCH_SIZE = 500
+# Líneas de cláusula re-renderizadas por lote (y tope por corrida del cron)
+CLAUSE_REFRESH_BATCH_SIZE = 200
+CLAUSE_REFRESH_LIMIT = 5000
+# Campos que cambian qué propiedades figuran libres en el catálogo público
+CATALOG_FIELDS = {"property_id", "state", "start_date", "end_date"}
+# Campos que cambian el próximo vencimiento del contrato
+DUE_DATE_FIELDS = {"state", "day_due", "start_date", "end_date"}
+
 
 class RentalContractClauseLine(models.Model):
     _name = "rental.contract.clause.line"
@@ -21,9 +49,25 @@ class RentalContractClauseLine(models.Model):
     sequence = fields.Integer(string="Orden", default=10)
     selected = fields.Boolean(string="Incluir", default=True)
     title = fields.Char(string="Título")
-    body = fields.Html(string="Texto", sanitize=True)
+    # El HTML se guarda una sola vez por contenido en rental.clause.body (que
+    # lo sanea al crearlo); las líneas con el mismo texto comparten el registro.
+    body_id = fields.Many2one("rental.clause.body", string="Contenido", index=True, ondelete="restrict")
+    body = fields.Html(
+        string="Texto", compute="_compute_body", inverse="_inverse_body", search="_search_body", sanitize=False
+    )
 
     template_id = fields.Many2one("rental.clause", string="Plantilla")
+    rendered_hash = fields.Char(
+        string="Versión de plantilla",
+        copy=False,
+        help="body_hash de la plantilla con la que se generó el texto. Si difiere, la línea está desactualizada.",
+    )
+    rendered_body_hash = fields.Char(
+        string="Versión del texto generado",
+        copy=False,
+        help="content_hash del texto tal como se generó desde la plantilla. Si el texto actual "
+             "difiere, fue editado a mano y las ediciones de la plantilla no lo pisan.",
+    )
     template_editable = fields.Boolean(
         string="Editable por plantilla",
         related="template_id.is_editable",
@@ -37,6 +81,61 @@ class RentalContractClauseLine(models.Model):
         store=False,
     )
 
+    @api.depends("body_id.body")
+    def _compute_body(self):
+        for line in self:
+            line.body = line.body_id.body
+
+    def _inverse_body(self):
+        self._set_bodies([line.body for line in self])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        # Las generadas por código desde una plantilla (cláusulas por defecto,
+        # importación) quedan marcadas con el texto con que se crearon
+        generated = [
+            line.id for line, vals in zip(lines, vals_list)
+            if vals.get("rendered_hash") and not vals.get("rendered_body_hash")
+        ]
+        if generated:
+            lines.flush_recordset(["body_id"])
+            self.env.cr.execute("""
+                UPDATE rental_contract_clause_line l
+                   SET rendered_body_hash = b.content_hash
+                  FROM rental_clause_body b
+                 WHERE b.id = l.body_id AND l.id = ANY(%s)
+            """, [generated])
+            lines.invalidate_recordset(["rendered_body_hash"])
+        return lines
+
+    def _search_body(self, operator, value):
+        return [("body_id.body", operator, value)]
+
+    def _set_bodies(self, bodies, extra_vals=None, rendered=False):
+        """Asigna `bodies` (en el orden de self) con un write por contenido distinto.
+
+        extra_vals: lista paralela de valores adicionales (dict) por línea.
+        rendered: los textos salen de la plantilla; se guarda su hash en
+        rendered_body_hash para reconocer después las ediciones a mano.
+        """
+        body_ids = self.env["rental.clause.body"]._find_or_create(bodies)
+        hashes = {}
+        if rendered and any(body_ids):
+            self.env.cr.execute(
+                "SELECT id, content_hash FROM rental_clause_body WHERE id = ANY(%s)",
+                [list({body_id for body_id in body_ids if body_id})],
+            )
+            hashes = dict(self.env.cr.fetchall())
+        groups = defaultdict(list)
+        for idx, (line, body_id) in enumerate(zip(self, body_ids)):
+            vals = dict(extra_vals[idx] if extra_vals else {}, body_id=body_id)
+            if rendered:
+                vals["rendered_body_hash"] = hashes.get(body_id, False)
+            groups[tuple(sorted(vals.items()))].append(line.id)
+        for vals, line_ids in groups.items():
+            self.browse(line_ids).write(dict(vals))
+
     @api.depends("body")
     def _compute_body_preview(self):
         for line in self:
@@ -59,6 +158,7 @@ class RentalContractClauseLine(models.Model):
 
             line.title = line.template_id.name
             template_body = line.template_id.body or ""
+            line.rendered_hash = line.template_id.body_hash
 
             if line.contract_id:
                 # Reemplaza placeholders con datos de ESTE contrato
@@ -66,6 +166,61 @@ class RentalContractClauseLine(models.Model):
             else:
                 # Si por alguna razón aún no está ligado a un contrato
                 line.body = template_body
+            line.rendered_body_hash = self.env["rental.clause.body"]._sanitized_hash(line.body)
+
+    def _render_from_template(self):
+        """Regenera el texto desde la plantilla y registra su versión."""
+        lines = self.filtered("template_id")
+        lines._set_bodies(
+            [line.contract_id._render_clause_body(line.template_id.body or "") for line in lines],
+            [{"rendered_hash": line.template_id.body_hash} for line in lines],
+            rendered=True,
+        )
+
+    @api.model
+    def _get_stale_line_ids(self, states=None, limit=None):
+        """Líneas cuya plantilla cambió desde que se generaron.
+
+        Quedan afuera las editadas a mano (el texto actual ya no es el que se
+        generó, ver rendered_body_hash): solo se regeneran con "Refrescar
+        cláusulas".
+        """
+        self.flush_model(["template_id", "rendered_hash", "rendered_body_hash", "body_id", "contract_id"])
+        self.env["rental.clause"].flush_model(["body_hash"])
+        self.env["rental.contract"].flush_model(["state"])
+        self.env.cr.execute("""
+            SELECT l.id
+              FROM rental_contract_clause_line l
+              JOIN rental_clause t ON t.id = l.template_id
+              JOIN rental_contract c ON c.id = l.contract_id
+              LEFT JOIN rental_clause_body b ON b.id = l.body_id
+             WHERE l.rendered_hash IS DISTINCT FROM t.body_hash
+               AND (l.rendered_body_hash IS NULL OR l.rendered_body_hash IS NOT DISTINCT FROM b.content_hash)
+               AND (%(states)s::varchar[] IS NULL OR c.state = ANY(%(states)s::varchar[]))
+             ORDER BY l.id
+             LIMIT %(limit)s
+        """, {"states": list(states) if states else None, "limit": limit})
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def cron_refresh_stale_clauses(self, states=("draft", "active"), batch_size=CLAUSE_REFRESH_BATCH_SIZE,
+                                   limit=CLAUSE_REFRESH_LIMIT):
+        """Propaga las ediciones de plantillas solo a las líneas desactualizadas.
+
+        Por defecto no toca contratos cerrados ni cancelados; states=None
+        incluye todos. Si quedan líneas pendientes, el cron se vuelve a
+        programar de inmediato.
+        """
+        line_ids = self._get_stale_line_ids(states, limit)
+        for batch_ids in split_every(batch_size, line_ids, list):
+            lines = self.browse(batch_ids)
+            lines.fetch(["contract_id", "template_id"])
+            lines._render_from_template()
+            lines.flush_recordset()
+            self.env.invalidate_all()
+        if len(line_ids) == limit:
+            self.env.ref("sga_property_rental.ir_cron_refresh_stale_clauses")._trigger()
+        return len(line_ids)
 
 
 class RentalContract(models.Model):
@@ -99,6 +254,17 @@ class RentalContract(models.Model):
 
     # === NUEVO: cláusulas (por contrato)
     clause_line_ids = fields.One2many("rental.contract.clause.line", "contract_id", string="Cláusulas")
+    rent_adjustment_ids = fields.One2many("rental.rent.adjustment", "contract_id", string="Ajustes de alquiler")
+
+    # Mantenido por _refresh_next_due_date() (facturación, pagos y cambios de estado)
+    next_due_date = fields.Date(
+        "Próximo vencimiento",
+        readonly=True,
+        copy=False,
+        index=True,
+        help="Vencimiento de la factura de alquiler impaga más antigua o, si está al día, "
+             "el del próximo período. Vacío si el contrato no está activo.",
+    )
 
     _sql_constraints = [
         ("day_due_range", "CHECK(day_due>=1 AND day_due<=28)", "El día de vencimiento debe estar entre 1 y 28."),
@@ -106,18 +272,38 @@ class RentalContract(models.Model):
 
     # --- Acciones de estado
     def action_activate(self):
-        for rec in self:
-            if rec.state != "draft":
-                continue
-            if rec.deposit_amount:
-                rec._create_out_invoice(amount=rec.deposit_amount, description=_("Depósito de garantía"))
-            rec.state = "active"
+        """Activa los borradores: todas las facturas de depósito en un solo create()."""
+        to_activate = self.filtered(lambda c: c.state == "draft")
+        deposit_vals = [
+            c._prepare_out_invoice_vals(c.deposit_amount, _("Depósito de garantía"), kind="deposit")
+            for c in to_activate
+            if c.deposit_amount
+        ]
+        if deposit_vals:
+            self.env["account.move"].create(deposit_vals)
+        to_activate.write({"state": "active"})
+        return True
 
     def action_close(self):
-        for rec in self:
-            if rec.state != "active":
-                continue
-            rec.state = "closed"
+        self.filtered(lambda c: c.state == "active").write({"state": "closed"})
+        return True
+
+    @api.model
+    @perf_sampled("cron_expire_contracts")
+    def cron_expire_contracts(self):
+        """Cierra los contratos activos cuya fecha de fin ya pasó.
+
+        Es un único write: los contadores de ocupación de los edificios
+        dependen del estado del contrato y se recalculan en el mismo paso.
+        """
+        today = fields.Date.context_today(self)
+        expired = self.search([
+            ("state", "=", "active"),
+            ("end_date", "!=", False),
+            ("end_date", "<", today),
+        ])
+        expired.action_close()
+        return expired
 
     # --- Utilidades de cláusulas
     def action_add_clause_line(self):
@@ -131,55 +317,224 @@ class RentalContract(models.Model):
             })
         return True
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env["rental.property"]._invalidate_catalog_cache()
+        active = records.filtered(lambda c: c.state == "active")
+        if active:
+            self._refresh_next_due_date(active.ids)
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if CATALOG_FIELDS.intersection(vals):
+            self.env["rental.property"]._invalidate_catalog_cache()
+        if DUE_DATE_FIELDS.intersection(vals):
+            self._refresh_next_due_date(self.ids)
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env["rental.property"]._invalidate_catalog_cache()
+        return res
+
+    @api.model
+    def _get_default_clause_templates(self):
+        return self.env["rental.clause"].sudo().search(
+            [("is_default", "=", True), ("active", "=", True)],
+            order="sequence, name"
+        )
+
+    def _prepare_default_clause_vals(self, templates, existing_titles=()):
+        self.ensure_one()
+        vals_list = []
+        seq = 10
+        for tpl in templates:
+            if tpl.name in existing_titles:
+                continue
+
+            template_body = tpl.body or ""
+            # 👉 AQUÍ usamos el helper para inyectar monto, fechas, multa, etc.
+            rendered_body = self._render_clause_body(template_body)
+
+            vals_list.append({
+                "contract_id": self.id,
+                "sequence": seq,
+                "selected": True,
+                "title": tpl.name,
+                "body": rendered_body,
+                "template_id": tpl.id,
+                "rendered_hash": tpl.body_hash,
+            })
+            seq += 10
+        return vals_list
+
     def action_load_default_clauses(self):
         """Carga plantillas marcadas como is_default y no duplica títulos ya cargados."""
+        defaults = self._get_default_clause_templates()
+        vals_list = []
         for rec in self:
-            Clause = self.env["rental.clause"].sudo()
-            defaults = Clause.search(
-                [("is_default", "=", True), ("active", "=", True)],
-                order="sequence, name"
-            )
             existing_titles = set(t for t in rec.clause_line_ids.mapped("title") if t)
-            vals_list = []
-            seq = 10
-            for tpl in defaults:
-                if tpl.name in existing_titles:
-                    continue
-
-                template_body = tpl.body or ""
-                # 👉 AQUÍ usamos el helper para inyectar monto, fechas, multa, etc.
-                rendered_body = rec._render_clause_body(template_body)
-
-                vals_list.append({
-                    "contract_id": rec.id,
-                    "sequence": seq,
-                    "selected": True,
-                    "title": tpl.name,
-                    "body": rendered_body,
-                    "template_id": tpl.id,
-                })
-                seq += 10
-
-            if vals_list:
-                self.env["rental.contract.clause.line"].create(vals_list)
+            vals_list += rec._prepare_default_clause_vals(defaults, existing_titles)
+        if vals_list:
+            self.env["rental.contract.clause.line"].create(vals_list)
         return True
 
+    # --- Importación masiva
+    @api.model
+    def _resolve_import_refs(self, model, keys, key_fields):
+        """Resuelve claves (id o valor de key_fields) a ids con una sola búsqueda."""
+        keys = {str(k).strip() for k in keys if k not in (None, False, "")}
+        if not keys:
+            return {}
+        # isdigit() acepta dígitos no ASCII ("²") que int() rechaza
+        ids = [int(k) for k in keys if k.isascii() and k.isdigit()]
+        domain = [("id", "in", ids)]
+        for fname in key_fields:
+            domain = ["|", (fname, "in", list(keys))] + domain
+        matches = {}
+        for rec in self.env[model].search(domain):
+            for key in [str(rec.id)] + [rec[fname] for fname in key_fields]:
+                if key in keys:
+                    matches.setdefault(key, set()).add(rec.id)
+        return matches
+
+    @api.model
+    def _validate_import_rows(self, rows, first_line=1):
+        """Convierte filas (dicts) en valores de create(). Devuelve (vals_list, errores)."""
+        properties = self._resolve_import_refs(
+            "rental.property", [r.get("property") for r in rows], ["code", "name"]
+        )
+        partners = self._resolve_import_refs(
+            "res.partner", [r.get(k) for r in rows for k in ("tenant", "agent")], ["vat", "ref", "name"]
+        )
+        currencies = self._resolve_import_refs("res.currency", [r.get("currency") for r in rows], ["name"])
+        states = dict(self._fields["state"].selection)
+
+        def ref(matches, value, label, errors, required=False):
+            value = str(value).strip() if value not in (None, False) else ""
+            if not value:
+                if required:
+                    errors.append(_("falta %s") % label)
+                return False
+            found = matches.get(value, set())
+            if len(found) != 1:
+                errors.append(
+                    (_("%s '%s' no encontrado") if not found else _("%s '%s' es ambiguo")) % (label, value)
+                )
+                return False
+            return next(iter(found))
+
+        vals_list = []
+        errors = []
+        for lineno, row in enumerate(rows, start=first_line):
+            row_errors = []
+            # Filas de CSV con más campos que el encabezado (ver wizard/csv_import_mixin.py)
+            if row.get("__extra__"):
+                row_errors.append(_("%s valores de más respecto del encabezado") % row["__extra__"])
+            vals = {
+                "property_id": ref(properties, row.get("property"), _("propiedad"), row_errors, required=True),
+                "tenant_id": ref(partners, row.get("tenant"), _("inquilino"), row_errors, required=True),
+                "agent_id": ref(partners, row.get("agent"), _("agente"), row_errors),
+            }
+            if row.get("currency"):
+                vals["currency_id"] = ref(currencies, row["currency"], _("moneda"), row_errors)
+            if row.get("name"):
+                vals["name"] = str(row["name"]).strip()
+
+            for fname in ("start_date", "end_date"):
+                if row.get(fname):
+                    try:
+                        vals[fname] = fields.Date.to_date(row[fname])
+                    except (ValueError, TypeError):
+                        # JSON puede traer números o listas en lugar de texto
+                        row_errors.append(_("fecha inválida en %s: '%s'") % (fname, row[fname]))
+            if not vals.get("start_date"):
+                row_errors.append(_("falta start_date"))
+
+            for fname in ("rent_amount", "penalty_amount", "deposit_amount", "day_due"):
+                if row.get(fname) in (None, ""):
+                    continue
+                try:
+                    value = float(str(row[fname]).replace(",", "."))
+                    vals[fname] = int(value) if fname == "day_due" else value
+                except (ValueError, OverflowError):
+                    row_errors.append(_("número inválido en %s: '%s'") % (fname, row[fname]))
+            for fname in ("rent_amount", "penalty_amount"):
+                if fname not in vals:
+                    row_errors.append(_("falta %s") % fname)
+            if not 1 <= vals.get("day_due", 5) <= 28:
+                row_errors.append(_("day_due debe estar entre 1 y 28"))
+
+            state = row.get("state") or "draft"
+            if state not in states or state == "cancel":
+                row_errors.append(_("estado inválido '%s'") % state)
+            vals["state"] = state
+
+            if row_errors:
+                errors.append(_("Fila %s: %s") % (lineno, "; ".join(row_errors)))
+            else:
+                vals_list.append(vals)
+        return vals_list, errors
+
+    @api.model
+    def import_contracts(self, rows, load_clauses=True, skip_errors=False, batch_size=IMPORT_BATCH_SIZE,
+                         first_line=1):
+        """Alta masiva de contratos (migraciones, API JSON, CSV).
+
+        Valida todo en memoria, reserva los números de contrato en bloque,
+        crea los contratos por lotes y genera las cláusulas por defecto con un
+        único create() por lote, cargando las plantillas una sola vez. Los
+        contratos importados como activos no generan factura de depósito.
+        Devuelve {"contract_ids": [...], "errors": [...]}.
+        """
+        vals_list, errors = self._validate_import_rows(rows, first_line)
+        if errors and not skip_errors:
+            return {"contract_ids": [], "errors": errors}
+
+        without_name = [vals for vals in vals_list if not vals.get("name")]
+        names = self.env["ir.sequence"]._next_block_by_code("rental.contract", len(without_name))
+        for vals, name in zip(without_name, names):
+            vals["name"] = name
+
+        templates = self._get_default_clause_templates() if load_clauses else self.env["rental.clause"]
+        ClauseLine = self.env["rental.contract.clause.line"]
+        contracts = self.browse()
+        for batch in split_every(batch_size, vals_list, list):
+            created = self.create(batch)
+            if templates:
+                line_vals = []
+                for contract in created:
+                    line_vals += contract._prepare_default_clause_vals(templates)
+                ClauseLine.create(line_vals)
+            contracts |= created
+        return {"contract_ids": contracts.ids, "errors": errors}
+
     # --- Facturación
-    def _create_out_invoice(self, amount, description):
+    def _prepare_out_invoice_vals(self, amount, description, kind="rent", period=False, quantity=1.0):
         self.ensure_one()
-        move = self.env["account.move"].create({
+        return {
             "move_type": "out_invoice",
             "partner_id": self.tenant_id.id,
             "invoice_date": fields.Date.context_today(self),
             "invoice_origin": self.name,
             "rental_contract_id": self.id,
             "rental_property_id": self.property_id.id,
+            "rental_invoice_kind": kind,
+            "rental_period": period,
             "invoice_line_ids": [(0, 0, {
                 "name": description,
-                "quantity": 1.0,
+                "quantity": quantity,
                 "price_unit": amount,
             })],
-        })
+        }
+
+    def _create_out_invoice(self, amount, description, kind="rent", period=False):
+        self.ensure_one()
+        move = self.env["account.move"].create(
+            self._prepare_out_invoice_vals(amount, description, kind=kind, period=period)
+        )
         return move
 
     def _next_period_invoice_date(self, base_date=None):
@@ -188,9 +543,11 @@ class RentalContract(models.Model):
         due_month = base if base.day <= self.day_due else (base + relativedelta(months=1))
         return date(due_month.year, due_month.month, self.day_due)
 
+    @perf_sampled("cron_generate_monthly_rents")
     def cron_generate_monthly_rents(self):
         today = fields.Date.context_today(self)
         contracts = self.search([("state", "=", "active"), ("start_date", "<=", today)])
+        invoices = self.env["account.move"]
         for c in contracts:
             if c.end_date and c.end_date < today:
                 continue
@@ -202,14 +559,176 @@ class RentalContract(models.Model):
                 ("invoice_date", ">=", first_day),
                 ("invoice_date", "<=", last_day),
                 ("state", "in", ["draft", "posted"]),
+                ("rental_invoice_kind", "!=", "penalty"),
             ])
             if existing:
                 continue
             inv_date = c._next_period_invoice_date(today)
             if inv_date < c.start_date:
                 continue
-            c._create_out_invoice(amount=c.rent_amount,
-                                  description=_("Alquiler mensual %s") % inv_date.strftime("%Y-%m"))
+            invoices |= c._create_out_invoice(amount=c.rent_amount,
+                                              description=_("Alquiler mensual %s") % inv_date.strftime("%Y-%m"),
+                                              period=inv_date.strftime("%Y-%m"))
+        # Con el cambio de día los contratos al día pasan al período siguiente
+        self._refresh_next_due_date()
+        return invoices
+
+    @api.model
+    def cron_generate_penalties(self, batch_size=PENALTY_BATCH_SIZE):
+        """Factura las multas por atraso de toda la cartera en una corrida.
+
+        penalty_amount es la multa diaria. Cada noche, para los contratos
+        activos con facturas de alquiler vencidas e impagas, se cobran los días
+        de atraso acumulados desde el vencimiento (o desde la última multa
+        facturada sobre esa factura), en una sola factura por contrato y mes.
+        """
+        today = fields.Date.context_today(self)
+        period = today.strftime("%Y-%m")
+        self.env.flush_all()
+        self.env.cr.execute("""
+            WITH overdue AS (
+                SELECT c.id AS contract_id,
+                       m.id AS move_id,
+                       %(today)s::date - GREATEST({due}, COALESCE(m.rental_penalty_billed_until, {due})) AS days
+                  FROM account_move m
+                  JOIN rental_contract c ON c.id = m.rental_contract_id
+                 WHERE c.state = 'active'
+                   AND c.penalty_amount > 0
+                   AND m.move_type = 'out_invoice'
+                   AND m.state = 'posted'
+                   AND m.payment_state IN ('not_paid', 'partial')
+                   AND COALESCE(m.rental_invoice_kind, 'rent') = 'rent'
+                   AND NOT EXISTS (
+                        SELECT 1 FROM account_move pm
+                         WHERE pm.rental_contract_id = c.id
+                           AND pm.rental_invoice_kind = 'penalty'
+                           AND pm.rental_period = %(period)s
+                           AND pm.state != 'cancel'
+                   )
+            )
+            SELECT contract_id, array_agg(move_id), SUM(days)
+              FROM overdue
+             WHERE days > 0
+             GROUP BY contract_id
+        """.format(due=RENT_DUE_DATE_SQL), {"today": today, "period": period})
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return self.env["account.move"]
+
+        contracts = self.browse([row[0] for row in rows])
+        contracts.fetch(["name", "tenant_id", "property_id", "penalty_amount"])
+        vals_list = []
+        source_ids = []
+        for contract, (_contract_id, move_ids, days) in zip(contracts, rows):
+            source_ids += move_ids
+            vals_list.append(contract._prepare_out_invoice_vals(
+                contract.penalty_amount,
+                _("Multa por atraso %(period)s (%(days)s días)") % {"period": period, "days": days},
+                kind="penalty",
+                period=period,
+                quantity=days,
+            ))
+
+        Move = self.env["account.move"]
+        penalties = Move.browse()
+        for batch in split_every(batch_size, vals_list, list):
+            penalties |= Move.create(batch)
+        Move.browse(source_ids).write({"rental_penalty_billed_until": today})
+        return penalties
+
+    # --- Vencimientos
+    @api.model
+    def _refresh_next_due_date(self, contract_ids=None):
+        """Recalcula next_due_date con un UPDATE por conjunto (todos si None).
+
+        Contratos activos: el vencimiento de la factura de alquiler publicada
+        e impaga más antigua; si no hay, el del período en curso (desde hoy o
+        desde el inicio del contrato), o el siguiente si ese ya está pagado.
+        Vacío si el contrato no está activo o ese vencimiento cae después de
+        la fecha de fin.
+        """
+        self.flush_model(["state", "day_due", "start_date", "end_date", "next_due_date"])
+        self.env["account.move"].flush_model([
+            "move_type", "state", "payment_state", "invoice_date",
+            "rental_contract_id", "rental_invoice_kind", "rental_period",
+        ])
+        self.env.cr.execute("""
+            WITH unpaid AS (
+                SELECT c.id AS contract_id, MIN({due}) AS due
+                  FROM account_move m
+                  JOIN rental_contract c ON c.id = m.rental_contract_id
+                 WHERE c.state = 'active'
+                   AND m.move_type = 'out_invoice'
+                   AND m.state = 'posted'
+                   AND m.payment_state IN ('not_paid', 'partial')
+                   AND COALESCE(m.rental_invoice_kind, 'rent') = 'rent'
+                   AND (%(ids)s::int[] IS NULL OR c.id = ANY(%(ids)s::int[]))
+                 GROUP BY c.id
+            ), current_period AS (
+                -- Mismo cálculo de vencimiento, tomando hoy (o el inicio) como fecha de factura
+                SELECT c.id AS contract_id, {due} AS due
+                  FROM rental_contract c
+                 CROSS JOIN LATERAL (SELECT GREATEST(%(today)s::date, c.start_date) AS invoice_date) m
+                 WHERE c.state = 'active'
+                   AND (%(ids)s::int[] IS NULL OR c.id = ANY(%(ids)s::int[]))
+            ), upcoming AS (
+                SELECT cp.contract_id,
+                       CASE WHEN EXISTS (
+                                SELECT 1 FROM account_move pm
+                                 WHERE pm.rental_contract_id = cp.contract_id
+                                   AND pm.move_type = 'out_invoice'
+                                   AND pm.state = 'posted'
+                                   AND pm.payment_state IN ('paid', 'in_payment')
+                                   AND COALESCE(pm.rental_invoice_kind, 'rent') = 'rent'
+                                   AND pm.rental_period = to_char(cp.due, 'YYYY-MM')
+                            )
+                            THEN (cp.due + interval '1 month')::date
+                            ELSE cp.due
+                       END AS due
+                  FROM current_period cp
+            ), computed AS (
+                SELECT c.id,
+                       CASE WHEN c.state != 'active' THEN NULL
+                            WHEN u.due IS NOT NULL THEN u.due
+                            WHEN c.end_date IS NOT NULL AND up.due > c.end_date THEN NULL
+                            ELSE up.due
+                       END AS due
+                  FROM rental_contract c
+                  LEFT JOIN unpaid u ON u.contract_id = c.id
+                  LEFT JOIN upcoming up ON up.contract_id = c.id
+                 WHERE (%(ids)s::int[] IS NULL OR c.id = ANY(%(ids)s::int[]))
+            )
+            UPDATE rental_contract c
+               SET next_due_date = computed.due
+              FROM computed
+             WHERE c.id = computed.id
+               AND c.next_due_date IS DISTINCT FROM computed.due
+        """.format(due=RENT_DUE_DATE_SQL), {
+            "ids": list(contract_ids) if contract_ids is not None else None,
+            "today": fields.Date.context_today(self),
+        })
+        self.invalidate_model(["next_due_date"])
+
+    def _refresh_payment_status(self):
+        """Morosidad y próximo vencimiento, tras cambios en facturas o pagos."""
+        self.env["rental.arrears.snapshot"]._refresh(self.ids)
+        self._refresh_next_due_date(self.ids)
+
+    def _schedule_payment_status_refresh(self):
+        """Como _refresh_payment_status(), pero una sola vez por transacción.
+
+        Publicar o conciliar N facturas acumula sus contratos y los recalcula
+        juntos justo antes del commit, en lugar de N recálculos sincrónicos.
+        """
+        if not self:
+            return
+        data = self.env.cr.precommit.data
+        contract_ids = data.get("sga_property_rental.payment_status")
+        if contract_ids is None:
+            contract_ids = data["sga_property_rental.payment_status"] = set()
+            Contract = self.env["rental.contract"].sudo()
+            self.env.cr.precommit.add(lambda: Contract.browse(contract_ids)._refresh_payment_status())
+        contract_ids.update(self.ids)
 
     # --- Reporte
     def action_print_full_pdf(self):
@@ -248,6 +767,7 @@ class RentalContract(models.Model):
         words = num2words(integer, lang="es")
         return words
 
+    @perf_sampled("_render_clause_body")
     def _render_clause_body(self, template_body):
         """Reemplaza placeholders {{...}} del cuerpo de la cláusula con datos del contrato."""
         self.ensure_one()
@@ -367,11 +887,16 @@ class RentalContract(models.Model):
 
         return body
 
+    def _refresh_rent_clauses(self):
+        """Re-renderiza solo las cláusulas cuya plantilla usa {{RENT_AMOUNT*}}."""
+        lines = self.env["rental.contract.clause.line"].search([
+            ("contract_id", "in", self.ids),
+            ("template_id.body", "ilike", "{{RENT_AMOUNT"),
+        ])
+        lines._render_from_template()
+        return lines
+
     def action_refresh_clauses(self):
         """Vuelve a generar el texto de las cláusulas desde la plantilla + datos actuales del contrato."""
-        for rec in self:
-            for line in rec.clause_line_ids:
-                if line.template_id:
-                    template_body = line.template_id.body or ""
-                    line.body = rec._render_clause_body(template_body)
+        self.clause_line_ids._render_from_template()
         return True
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+from .perf_sample import perf_sample
+from .read_replica import call_on_replica, check_replica_fresh
+
+# Reportes de análisis que pueden leerse desde la réplica. Los documentos
+# legales (contrato, liquidación a propietario) siempre salen de la principal.
+REPLICA_REPORTS = {
+    "sga_property_rental.report_invoice_rental_to_collect_document",
+    "sga_property_rental.report_invoice_rental_paid_document",
+    "sga_property_rental.report_rental_agents_pdf_document",
+    "sga_property_rental.report_invoice_rental_wizard_document",
+    "sga_property_rental.report_vendor_invoice_rental_wizard_document",
+}
+
+
+class IrActionsReport(models.Model):
+    _inherit = "ir.actions.report"
+
+    def _render_qweb_pdf(self, report_ref, res_ids=None, data=None):
+        report = self._get_report(report_ref)
+        if not (report.report_name or "").startswith("sga_property_rental."):
+            return super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+
+        def render(env):
+            # Un registro recién creado o editado puede no haber llegado todavía a la réplica
+            check_replica_fresh(self.env, env, report.model, res_ids)
+            return super(IrActionsReport, self.with_env(env))._render_qweb_pdf(
+                report_ref, res_ids=res_ids, data=data
+            )
+
+        with perf_sample(self.env, "report:%s" % report.report_name) as stats:
+            if report.report_name in REPLICA_REPORTS:
+                result = call_on_replica(self.env, render, "report:%s" % report.report_name)
+            else:
+                result = render(self.env)
+            if stats is not None:
+                stats["records"] = len(res_ids or [])
+        return result
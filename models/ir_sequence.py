@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models
+
+
+class IrSequence(models.Model):
+    _inherit = "ir.sequence"
+
+    @api.model
+    def _next_block_by_code(self, sequence_code, count):
+        """Reserva `count` números consecutivos de la secuencia en una sola llamada.
+
+        Equivale a llamar next_by_code() `count` veces. Las secuencias con
+        rangos por fecha se resuelven número por número.
+        """
+        if count <= 0:
+            return []
+        self.check_access("read")
+        company_id = self.env.company.id
+        seq = self.search(
+            [("code", "=", sequence_code), ("company_id", "in", [company_id, False])],
+            order="company_id",
+            limit=1,
+        )
+        if not seq:
+            return [self.next_by_code(sequence_code) for _i in range(count)]
+        if seq.use_date_range:
+            return [seq._next() for _i in range(count)]
+
+        step = seq.number_increment
+        if seq.implementation == "standard":
+            # La secuencia de PostgreSQL ya está creada con el incremento configurado
+            self.env.cr.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                ("ir_sequence_%03d" % seq.id, count),
+            )
+            numbers = sorted(row[0] for row in self.env.cr.fetchall())
+        else:
+            self.env.cr.execute("SELECT number_next FROM ir_sequence WHERE id = %s FOR UPDATE NOWAIT", [seq.id])
+            self.env.cr.execute(
+                "UPDATE ir_sequence SET number_next = number_next + %s WHERE id = %s RETURNING number_next",
+                (step * count, seq.id),
+            )
+            first = self.env.cr.fetchone()[0] - step * count
+            numbers = [first + step * i for i in range(count)]
+            seq.invalidate_recordset(["number_next"])
+        return [seq.get_next_char(number) for number in numbers]
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+
+PARAM_LAST_REFRESH = "sga_property_rental.occupancy_last_refresh"
+
+
+class RentalOccupancyReport(models.Model):
+    """Hechos mensuales de ocupación por propiedad.
+
+    Tabla materializada: la llena cron_refresh_occupancy() expandiendo los
+    contratos en meses con una sola consulta, y se consulta desde las vistas
+    pivot/gráfico sin recorrer contratos en Python.
+    """
+    _name = "rental.occupancy.report"
+    _inherit = ["rental.read.replica.mixin"]
+    _description = "Ocupación mensual de propiedades"
+    _order = "month desc, property_id"
+    _rec_name = "property_id"
+
+    month = fields.Date("Mes", readonly=True, index=True)
+    property_id = fields.Many2one("rental.property", "Propiedad", readonly=True, index=True)
+    building_id = fields.Many2one("rental.building", "Edificio", readonly=True)
+    property_type_id = fields.Many2one("rental.property.type", "Tipo de Propiedad", readonly=True)
+    city_id = fields.Many2one("res.city", "Ciudad", readonly=True)
+    state_id = fields.Many2one("res.country.state", "Departamento/Estado", readonly=True)
+    owner_id = fields.Many2one("res.partner", "Propietario", readonly=True)
+    rental_type = fields.Selection(
+        selection=lambda self: self.env["rental.property"]._fields["rental_type"].selection,
+        string="Tipo de Operación",
+        readonly=True,
+    )
+    days_in_month = fields.Integer("Días del mes", readonly=True)
+    occupied_days = fields.Integer("Días ocupada", readonly=True)
+    vacant_days = fields.Integer("Días libre", readonly=True)
+    occupied = fields.Boolean("Ocupada en el mes", readonly=True)
+    occupancy_rate = fields.Float("Ocupación (%)", readonly=True, aggregator="avg", digits=(5, 1))
+    rent_amount = fields.Monetary("Alquiler del mes", currency_field="currency_id", readonly=True)
+    currency_id = fields.Many2one("res.currency", "Moneda", readonly=True)
+
+    @api.model
+    def _rebuild(self, property_ids=None, date_from=None):
+        """Regenera los hechos de las propiedades dadas (todas si None) desde date_from.
+
+        Cada propiedad se expande desde el mes de su primer contrato (o de su
+        alta, si es anterior) hasta el mes en curso. Solo cuentan los
+        contratos activos o cerrados: los borradores y cancelados no ocupan.
+        """
+        self.env.flush_all()
+        today = fields.Date.context_today(self)
+        params = {
+            "ids": list(property_ids) if property_ids is not None else None,
+            "date_from": date_from.replace(day=1) if date_from else None,
+            "date_to": today.replace(day=1),
+            "currency_id": self.env.company.currency_id.id,
+            "uid": self.env.uid,
+        }
+        self.env.cr.execute("""
+            DELETE FROM rental_occupancy_report
+             WHERE (%(ids)s::int[] IS NULL OR property_id = ANY(%(ids)s::int[]))
+               AND (%(date_from)s::date IS NULL OR month >= %(date_from)s::date)
+        """, params)
+        self.env.cr.execute("""
+            WITH props AS (
+                SELECT p.id,
+                       date_trunc('month', LEAST(p.create_date::date,
+                                                 COALESCE(fc.first_start, p.create_date::date)))::date AS first_month
+                  FROM rental_property p
+                  LEFT JOIN (
+                        SELECT property_id, MIN(start_date) AS first_start
+                          FROM rental_contract
+                         WHERE state IN ('active', 'closed')
+                         GROUP BY property_id
+                       ) fc ON fc.property_id = p.id
+                 WHERE %(ids)s::int[] IS NULL OR p.id = ANY(%(ids)s::int[])
+            ), months AS (
+                SELECT props.id AS property_id,
+                       m.month::date AS month,
+                       (m.month + interval '1 month - 1 day')::date AS month_end
+                  FROM props
+                 CROSS JOIN LATERAL generate_series(
+                       GREATEST(props.first_month, %(date_from)s::date)::timestamp,
+                       %(date_to)s::date::timestamp,
+                       interval '1 month'
+                 ) AS m(month)
+            ), facts AS (
+                SELECT f.property_id,
+                       f.month,
+                       (f.month_end - f.month + 1) AS days_in_month,
+                       LEAST(f.month_end - f.month + 1, COALESCE(SUM(
+                           LEAST(COALESCE(c.end_date, f.month_end), f.month_end)
+                           - GREATEST(c.start_date, f.month) + 1
+                       ), 0)) AS occupied_days,
+                       COALESCE(SUM(c.rent_amount), 0) AS rent_amount
+                  FROM months f
+                  LEFT JOIN rental_contract c
+                         ON c.property_id = f.property_id
+                        AND c.state IN ('active', 'closed')
+                        AND c.start_date <= f.month_end
+                        AND (c.end_date IS NULL OR c.end_date >= f.month)
+                 GROUP BY f.property_id, f.month, f.month_end
+            )
+            INSERT INTO rental_occupancy_report (
+                   month, property_id, building_id, property_type_id, city_id, state_id,
+                   owner_id, rental_type, days_in_month, occupied_days, vacant_days,
+                   occupied, occupancy_rate, rent_amount, currency_id,
+                   create_uid, create_date, write_uid, write_date)
+            SELECT facts.month, p.id, p.building_id, p.property_type_id, p.city, p.state_id,
+                   p.owner_id, p.rental_type, facts.days_in_month, facts.occupied_days,
+                   facts.days_in_month - facts.occupied_days,
+                   facts.occupied_days > 0,
+                   100.0 * facts.occupied_days / facts.days_in_month,
+                   facts.rent_amount, %(currency_id)s,
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM facts
+              JOIN rental_property p ON p.id = facts.property_id
+        """, params)
+        self.invalidate_model()
+
+    @api.model
+    def cron_refresh_occupancy(self, full=False):
+        """Refresco incremental.
+
+        Regenera el historial completo solo de las propiedades cuyos datos o
+        contratos cambiaron desde la última corrida, y el mes en curso de
+        todas las demás. Con full=True (o en la primera corrida) reconstruye
+        todo, por ejemplo después de borrar contratos.
+        """
+        Param = self.env["ir.config_parameter"].sudo()
+        last_refresh = Param.get_param(PARAM_LAST_REFRESH)
+        started = fields.Datetime.now()
+
+        if full or not last_refresh:
+            self._rebuild()
+        else:
+            self.env.flush_all()
+            self.env.cr.execute("""
+                SELECT id FROM rental_property WHERE write_date > %(since)s
+                 UNION
+                SELECT property_id FROM rental_contract WHERE write_date > %(since)s
+            """, {"since": last_refresh})
+            changed_ids = [row[0] for row in self.env.cr.fetchall()]
+            if changed_ids:
+                self._rebuild(property_ids=changed_ids)
+            self._rebuild(date_from=fields.Date.context_today(self))
+
+        Param.set_param(PARAM_LAST_REFRESH, fields.Datetime.to_string(started))
+        return True
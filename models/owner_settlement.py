@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+
+class RentalOwnerSettlement(models.Model):
+    _name = "rental.owner.settlement"
+    _description = "Liquidación a propietario"
+    _order = "date_to desc, owner_id"
+
+    name = fields.Char(
+        "Número", required=True, copy=False, readonly=True,
+        default=lambda self: self.env["ir.sequence"].next_by_code("rental.owner.settlement")
+    )
+    owner_id = fields.Many2one("res.partner", "Propietario", required=True, index=True)
+    date_from = fields.Date("Desde", required=True)
+    date_to = fields.Date("Hasta", required=True)
+    company_id = fields.Many2one("res.company", default=lambda self: self.env.company)
+    currency_id = fields.Many2one("res.currency", "Moneda", related="company_id.currency_id")
+    state = fields.Selection(
+        [("draft", "Borrador"), ("done", "Confirmada"), ("cancel", "Cancelada")],
+        string="Estado",
+        default="draft",
+    )
+    line_ids = fields.One2many("rental.owner.settlement.line", "settlement_id", string="Detalle por propiedad")
+
+    rent_invoiced = fields.Monetary("Alquiler facturado", currency_field="currency_id", readonly=True)
+    rent_collected = fields.Monetary("Alquiler cobrado", currency_field="currency_id", readonly=True)
+    expenses = fields.Monetary("Gastos", currency_field="currency_id", readonly=True)
+    net_amount = fields.Monetary("A pagar al propietario", currency_field="currency_id", readonly=True)
+
+    def action_confirm(self):
+        self.filtered(lambda s: s.state == "draft").write({"state": "done"})
+
+    def action_cancel(self):
+        self.write({"state": "cancel"})
+
+    def action_print_pdf(self):
+        return self.env.ref("sga_property_rental.report_owner_settlement").report_action(self)
+
+    @api.model
+    def _fetch_owner_totals(self, date_from, date_to, owner_ids=None):
+        """Totales por (propietario, propiedad) con una sola consulta agrupada.
+
+        Facturas de cliente: alquiler (y multas) facturado en el período, por
+        fecha de factura. Cobrado: pagos conciliados con esas facturas cuya
+        fecha de conciliación (max_date) cae en el período, sin importar
+        cuándo se facturó; los cruces entre factura y nota de crédito no son
+        cobros. Facturas de proveedor: gastos cargados a la propiedad,
+        directo o por el contrato. Los depósitos de garantía no son del
+        propietario y se excluyen. Montos en moneda de la compañía.
+        """
+        self.env.flush_all()
+        self.env.cr.execute("""
+            WITH moves AS (
+                SELECT m.id, m.move_type, m.invoice_date, m.amount_total_signed, p.owner_id, p.id AS property_id
+                  FROM account_move m
+                  LEFT JOIN rental_contract cc ON cc.id = m.rental_contract_id
+                  LEFT JOIN rental_contract vc ON vc.id = m.rental_contract_vendor_id
+                  JOIN rental_property p ON p.id = COALESCE(m.rental_property_id, cc.property_id, vc.property_id)
+                 WHERE m.state = 'posted'
+                   AND m.move_type IN ('out_invoice', 'out_refund', 'in_invoice', 'in_refund')
+                   AND m.company_id = %(company_id)s
+                   AND COALESCE(m.rental_invoice_kind, 'rent') != 'deposit'
+                   AND (%(owner_ids)s::int[] IS NULL OR p.owner_id = ANY(%(owner_ids)s::int[]))
+            ),
+            invoiced AS (
+                SELECT owner_id, property_id,
+                       COALESCE(SUM(amount_total_signed)
+                                FILTER (WHERE move_type IN ('out_invoice', 'out_refund')), 0) AS invoiced,
+                       COALESCE(-SUM(amount_total_signed)
+                                FILTER (WHERE move_type IN ('in_invoice', 'in_refund')), 0) AS expenses
+                  FROM moves
+                 WHERE invoice_date BETWEEN %(date_from)s AND %(date_to)s
+                 GROUP BY owner_id, property_id
+            ),
+            -- Cada conciliación vista desde ambos lados; el signo queda del lado de la factura
+            partials AS (
+                SELECT debit_move_id AS line_id, credit_move_id AS other_line_id, amount
+                  FROM account_partial_reconcile
+                 WHERE max_date BETWEEN %(date_from)s AND %(date_to)s
+                   AND company_id = %(company_id)s
+                 UNION ALL
+                SELECT credit_move_id, debit_move_id, -amount
+                  FROM account_partial_reconcile
+                 WHERE max_date BETWEEN %(date_from)s AND %(date_to)s
+                   AND company_id = %(company_id)s
+            ),
+            collected AS (
+                SELECT mv.owner_id, mv.property_id, SUM(pr.amount) AS collected
+                  FROM partials pr
+                  JOIN account_move_line il ON il.id = pr.line_id
+                  JOIN moves mv ON mv.id = il.move_id
+                  JOIN account_move_line ol ON ol.id = pr.other_line_id
+                  JOIN account_move pm ON pm.id = ol.move_id
+                 WHERE mv.move_type IN ('out_invoice', 'out_refund')
+                   AND pm.move_type = 'entry'
+                 GROUP BY mv.owner_id, mv.property_id
+            )
+            SELECT COALESCE(i.owner_id, c.owner_id),
+                   COALESCE(i.property_id, c.property_id),
+                   COALESCE(i.invoiced, 0),
+                   COALESCE(c.collected, 0),
+                   COALESCE(i.expenses, 0)
+              FROM invoiced i
+              FULL JOIN collected c ON c.owner_id = i.owner_id AND c.property_id = i.property_id
+        """, {
+            "date_from": date_from,
+            "date_to": date_to,
+            "company_id": self.env.company.id,
+            "owner_ids": list(owner_ids) if owner_ids else None,
+        })
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _generate(self, date_from, date_to, owner_ids=None):
+        """Genera (o regenera, si están en borrador) las liquidaciones del período."""
+        if date_from > date_to:
+            raise UserError(_("La fecha desde debe ser anterior a la fecha hasta."))
+
+        by_owner = defaultdict(list)
+        for owner_id, property_id, invoiced, collected, expenses in self._fetch_owner_totals(
+            date_from, date_to, owner_ids
+        ):
+            by_owner[owner_id].append({
+                "property_id": property_id,
+                "rent_invoiced": invoiced,
+                "rent_collected": collected,
+                "expenses": expenses,
+                "net_amount": collected - expenses,
+            })
+        if not by_owner:
+            return self.browse()
+
+        existing = self.search([
+            ("owner_id", "in", list(by_owner)),
+            ("date_from", "=", date_from),
+            ("date_to", "=", date_to),
+            ("state", "!=", "cancel"),
+        ])
+        # Las confirmadas no se tocan; los borradores se actualizan en el lugar
+        # (conservan su número y no hace falta permiso de borrado)
+        confirmed_owners = set(existing.filtered(lambda s: s.state == "done").owner_id.ids)
+        drafts = {s.owner_id.id: s for s in existing.filtered(lambda s: s.state == "draft")}
+
+        settlements = self.browse()
+        vals_list = []
+        for owner_id, lines in by_owner.items():
+            if owner_id in confirmed_owners:
+                continue
+            collected = sum(l["rent_collected"] for l in lines)
+            expenses = sum(l["expenses"] for l in lines)
+            vals = {
+                "rent_invoiced": sum(l["rent_invoiced"] for l in lines),
+                "rent_collected": collected,
+                "expenses": expenses,
+                "net_amount": collected - expenses,
+            }
+            draft = drafts.get(owner_id)
+            if draft:
+                draft._update_lines(lines)
+                draft.write(vals)
+                settlements |= draft
+            else:
+                vals_list.append(dict(
+                    vals,
+                    owner_id=owner_id,
+                    date_from=date_from,
+                    date_to=date_to,
+                    line_ids=[(0, 0, l) for l in lines],
+                ))
+        names = self.env["ir.sequence"]._next_block_by_code("rental.owner.settlement", len(vals_list))
+        for vals, name in zip(vals_list, names):
+            vals["name"] = name
+        return settlements | self.create(vals_list)
+
+    def _update_lines(self, lines):
+        """Reemplaza el detalle de un borrador: actualiza por propiedad y crea lo nuevo."""
+        self.ensure_one()
+        current = {line.property_id.id: line for line in self.line_ids}
+        commands = []
+        for vals in lines:
+            line = current.pop(vals["property_id"], None)
+            commands.append((1, line.id, vals) if line else (0, 0, vals))
+        self.write({"line_ids": commands})
+        # Propiedades que ya no tienen movimientos en el período: son detalle de
+        # un borrador que el usuario puede regenerar, se quitan sin exigir borrado
+        if current:
+            self.env["rental.owner.settlement.line"].browse(
+                [line.id for line in current.values()]
+            ).sudo().unlink()
+
+
+class RentalOwnerSettlementLine(models.Model):
+    _name = "rental.owner.settlement.line"
+    _description = "Detalle de liquidación a propietario"
+    _order = "settlement_id, property_id"
+
+    settlement_id = fields.Many2one("rental.owner.settlement", "Liquidación", required=True, ondelete="cascade")
+    property_id = fields.Many2one("rental.property", "Propiedad", required=True)
+    currency_id = fields.Many2one(related="settlement_id.currency_id")
+    rent_invoiced = fields.Monetary("Alquiler facturado", currency_field="currency_id")
+    rent_collected = fields.Monetary("Alquiler cobrado", currency_field="currency_id")
+    expenses = fields.Monetary("Gastos", currency_field="currency_id")
+    net_amount = fields.Monetary("Neto", currency_field="currency_id")
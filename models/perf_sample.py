@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import functools
+import random
+import threading
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+from odoo.http import request
+
+# Fracción de ejecuciones medidas (0 = apagado, 1 = todas)
+PARAM_SAMPLE_RATE = "sga_property_rental.perf_sample_rate"
+# Días que se conservan las muestras
+SAMPLE_RETENTION_DAYS = 30
+
+
+@contextlib.contextmanager
+def perf_sample(env, operation):
+    """Mide tiempo, consultas SQL y registros procesados de un bloque.
+
+    Devuelve un dict donde el bloque puede informar "records"; es None cuando
+    la muestra no se toma. Con el muestreo apagado el costo es leer un
+    parámetro ya cacheado. Si el bloque falla no se registra nada.
+    """
+    Sample = env["rental.perf.sample"]
+    if not Sample._should_sample():
+        yield None
+        return
+
+    # sql_db solo cuenta consultas en hilos que tienen estos atributos
+    # (los hilos HTTP); en crons los agregamos mientras dura la medición.
+    thread = threading.current_thread()
+    added = not hasattr(thread, "query_count")
+    if added:
+        thread.query_count = 0
+        thread.query_time = 0.0
+    try:
+        stats = {"records": 0}
+        query_count, query_time = thread.query_count, thread.query_time
+        start = time.perf_counter()
+        yield stats
+        Sample.sudo().create({
+            "operation": operation,
+            "duration_ms": (time.perf_counter() - start) * 1000.0,
+            "query_count": thread.query_count - query_count,
+            "query_time_ms": (thread.query_time - query_time) * 1000.0,
+            "records": stats["records"],
+        })
+    finally:
+        if added:
+            del thread.query_count
+            del thread.query_time
+
+
+def perf_sampled(operation):
+    """Decorador de perf_sample() para métodos de modelo y de controlador.
+
+    Como registros procesados usa el largo del recordset devuelto o, si no
+    devuelve uno, el de self (1 para controladores).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            env = self.env if isinstance(self, models.BaseModel) else request.env
+            with perf_sample(env, operation) as stats:
+                result = func(self, *args, **kwargs)
+                if stats is not None:
+                    if isinstance(result, models.BaseModel):
+                        stats["records"] = len(result)
+                    elif isinstance(self, models.BaseModel):
+                        stats["records"] = len(self)
+                    else:
+                        stats["records"] = 1
+            return result
+        return wrapper
+    return decorator
+
+
+class RentalPerfSample(models.Model):
+    _name = "rental.perf.sample"
+    _description = "Muestra de rendimiento"
+    _order = "id desc"
+    _rec_name = "operation"
+
+    operation = fields.Char("Operación", required=True, index=True, readonly=True)
+    duration_ms = fields.Float("Duración (ms)", readonly=True, aggregator="avg")
+    query_count = fields.Integer("Consultas SQL", readonly=True, aggregator="avg")
+    query_time_ms = fields.Float("Tiempo SQL (ms)", readonly=True, aggregator="avg")
+    records = fields.Integer("Registros procesados", readonly=True)
+    user_id = fields.Many2one("res.users", "Usuario", readonly=True, default=lambda self: self.env.uid)
+
+    @api.model
+    def _should_sample(self):
+        rate = self.env["ir.config_parameter"].sudo().get_param(PARAM_SAMPLE_RATE)
+        try:
+            rate = float(rate or 0.0)
+        except ValueError:
+            return False
+        return rate > 0 and random.random() < rate
+
+    @api.autovacuum
+    def _gc_old_samples(self):
+        limit = fields.Datetime.now() - timedelta(days=SAMPLE_RETENTION_DAYS)
+        self.search([("create_date", "<", limit)]).unlink()
+
+
+class RentalPerfStats(models.Model):
+    _name = "rental.perf.stats"
+    _inherit = ["rental.read.replica.mixin"]
+    _description = "Percentiles de rendimiento por operación"
+    _auto = False
+    _order = "p95_ms desc"
+    _rec_name = "operation"
+
+    operation = fields.Char("Operación", readonly=True)
+    sample_count = fields.Integer("Muestras", readonly=True)
+    p50_ms = fields.Float("p50 (ms)", readonly=True, aggregator="max")
+    p95_ms = fields.Float("p95 (ms)", readonly=True, aggregator="max")
+    p99_ms = fields.Float("p99 (ms)", readonly=True, aggregator="max")
+    max_ms = fields.Float("Máximo (ms)", readonly=True, aggregator="max")
+    avg_query_count = fields.Float("Consultas SQL (prom.)", readonly=True, aggregator="avg")
+    avg_query_time_ms = fields.Float("Tiempo SQL prom. (ms)", readonly=True, aggregator="avg")
+    avg_records = fields.Float("Registros (prom.)", readonly=True, aggregator="avg")
+    last_sample = fields.Datetime("Última muestra", readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute("""
+            CREATE OR REPLACE VIEW rental_perf_stats AS (
+                SELECT MIN(id) AS id,
+                       operation,
+                       COUNT(*) AS sample_count,
+                       percentile_cont(0.50) WITHIN GROUP (ORDER BY duration_ms) AS p50_ms,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms) AS p95_ms,
+                       percentile_cont(0.99) WITHIN GROUP (ORDER BY duration_ms) AS p99_ms,
+                       MAX(duration_ms) AS max_ms,
+                       AVG(query_count) AS avg_query_count,
+                       AVG(query_time_ms) AS avg_query_time_ms,
+                       AVG(records) AS avg_records,
+                       MAX(create_date) AS last_sample
+                  FROM rental_perf_sample
+                 GROUP BY operation
+            )
+        """)
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+from .property import invalidate_visit_pages, visit_page_refs
+
+
+class ProductTemplate(models.Model):
+    _inherit = "product.template"
+
+    def write(self, vals):
+        res = super().write(vals)
+        # Nombre e imágenes salen en la página "Agendar visita" cacheada
+        invalidate_visit_pages(self.env.cr, visit_page_refs(product_tmpl_ids=self.ids))
+        return res
+
+    def unlink(self):
+        refs = visit_page_refs(product_tmpl_ids=self.ids)
+        res = super().unlink()
+        invalidate_visit_pages(self.env.cr, refs)
+        return res
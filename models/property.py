@@ -1,8 +1,49 @@
 # -*- coding: utf-8 -*-
+import base64
+import hashlib
+import math
+from datetime import timedelta
+
 from odoo import api, fields, models, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL, escape_psql
+
+from ..tools.cache import VersionedTTLCache
 from urllib.parse import quote_plus
 
+# Radio medio terrestre (km) para la fórmula de haversine
+EARTH_RADIUS_KM = 6371.0088
+# Kilómetros por grado de latitud (aprox. constante)
+KM_PER_DEGREE = 111.32
+
+# Catálogo público: límites de los rangos de precio (moneda de la compañía)
+CATALOG_PRICE_BOUNDS = [0, 1500000, 2500000, 4000000, 6000000, 10000000]
+CATALOG_PAGE_SIZE = 24
+# Conteos de facetas: se recalculan como máximo cada 60 s por worker
+catalog_facet_cache = VersionedTTLCache(ttl=60)
+# Etiquetas de disponibilidad de la tienda para visitantes anónimos, por página
+shop_availability_cache = VersionedTTLCache(ttl=60, max_size=1024)
+# Fragmentos de la página "Agendar visita" para visitantes anónimos, por producto
+visit_page_cache = VersionedTTLCache(ttl=300, max_size=1024)
+
+
+def visit_page_refs(property_ids=(), product_tmpl_ids=()):
+    """Referencias para descartar páginas de visita con invalidate_visit_pages()."""
+    return {("property", pid) for pid in property_ids if pid} | {
+        ("product", tid) for tid in product_tmpl_ids if tid
+    }
+
+
+def _visit_page_matches(key, page, refs):
+    # key = (product_tmpl_id, lang, tz); page["property_id"] es la propiedad mostrada
+    return ("product", key[0]) in refs or ("property", page["property_id"]) in refs
+
+
+def invalidate_visit_pages(cr, refs):
+    """Al confirmar, descarta solo las páginas de los productos/propiedades tocados."""
+    if refs:
+        visit_page_cache.discard_on_commit(cr, _visit_page_matches, refs)
+
 #cambios Jorge
 class RentalPropertyType(models.Model):
     _name = "rental.property.type"
@@ -25,18 +66,82 @@ class RentalBuilding(models.Model):
     state_id = fields.Many2one("res.country.state", "Estado/Departamento")
     country_id = fields.Many2one("res.country", "País", default=lambda self: self.env.company.country_id)
     property_ids = fields.One2many("rental.property", "building_id", string="Unidades")
-    property_count = fields.Integer("Cantidad de Unidades", compute="_compute_property_count")
     active = fields.Boolean(default=True)
+    currency_id = fields.Many2one("res.currency", "Moneda", default=lambda self: self.env.company.currency_id)
+
+    # Contadores almacenados (se calculan con una consulta agrupada para todo el lote)
+    property_count = fields.Integer("Cantidad de Unidades", compute="_compute_unit_stats", store=True)
+    occupied_count = fields.Integer("Unidades ocupadas", compute="_compute_unit_stats", store=True)
+    vacant_count = fields.Integer("Unidades libres", compute="_compute_unit_stats", store=True)
+    occupancy_rate = fields.Float(
+        "Ocupación (%)", compute="_compute_unit_stats", store=True, aggregator="avg", digits=(5, 1)
+    )
+    rent_roll = fields.Monetary(
+        "Alquiler mensual total", currency_field="currency_id", compute="_compute_unit_stats", store=True
+    )
 
-    @api.depends("property_ids")
-    def _compute_property_count(self):
+    @api.depends(
+        "property_ids",
+        "property_ids.active",
+        "property_ids.contract_ids.state",
+        "property_ids.contract_ids.start_date",
+        "property_ids.contract_ids.end_date",
+        "property_ids.contract_ids.rent_amount",
+    )
+    def _compute_unit_stats(self):
+        stats = self._origin._get_unit_stats()
         for rec in self:
-            rec.property_count = len(rec.property_ids)
+            total, occupied, rent = stats.get(rec._origin.id, (0, 0, 0.0))
+            rec.property_count = total
+            rec.occupied_count = occupied
+            rec.vacant_count = total - occupied
+            rec.occupancy_rate = 100.0 * occupied / total if total else 0.0
+            rec.rent_roll = rent
+
+    def _get_unit_stats(self):
+        """Devuelve {building_id: (unidades, ocupadas, alquiler_mensual)} en una sola consulta.
+
+        Una unidad está ocupada si tiene un contrato activo vigente hoy, con el
+        mismo criterio que RentalProperty._compute_current_contract.
+        """
+        if not self.ids:
+            return {}
+        self.env["rental.property"].flush_model(["building_id", "active"])
+        self.env["rental.contract"].flush_model(["property_id", "state", "start_date", "end_date", "rent_amount"])
+        self.env.cr.execute("""
+            SELECT p.building_id,
+                   COUNT(*),
+                   COUNT(cur.property_id),
+                   COALESCE(SUM(cur.rent), 0)
+              FROM rental_property p
+              LEFT JOIN (
+                    SELECT c.property_id, SUM(c.rent_amount) AS rent
+                      FROM rental_contract c
+                     WHERE c.state = 'active'
+                       AND c.start_date <= %(today)s
+                       AND (c.end_date IS NULL OR c.end_date >= %(today)s)
+                     GROUP BY c.property_id
+                   ) cur ON cur.property_id = p.id
+             WHERE p.building_id IN %(ids)s
+               AND p.active
+             GROUP BY p.building_id
+        """, {"ids": tuple(self.ids), "today": fields.Date.context_today(self)})
+        return {row[0]: row[1:] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def cron_refresh_unit_stats(self):
+        """La ocupación depende de la fecha del día: se recalcula todas las noches."""
+        buildings = self.with_context(active_test=False).search([])
+        for fname in ("property_count", "occupied_count", "vacant_count", "occupancy_rate", "rent_roll"):
+            self.env.add_to_compute(self._fields[fname], buildings)
+        buildings.flush_recordset()
 
 #cami + original
 class RentalProperty(models.Model):
     _name = "rental.property"
+    _inherit = ["image.mixin"]
     _description = "Propiedad (Inmueble)"
+    _rec_names_search = ["search_text"]
 
     name = fields.Char("Nombre/Identificador", required=True)
     code = fields.Char("Código", compute="_compute_code", store=True, readonly=True)
@@ -93,7 +198,8 @@ class RentalProperty(models.Model):
 
     owner_id = fields.Many2one("res.partner", "Propietario", required=True)
     acquisition_date = fields.Date("Fecha de adquisicion del inmueble")
-    image_1920 = fields.Image("Imagen")  # v18 friendly
+    # image.mixin genera al subir las variantes reducidas (image_1024 ... image_128)
+    image_1920 = fields.Image("Imagen", max_width=1920, max_height=1920)  # v18 friendly
     inventory_ids = fields.One2many("rental.property.inventory", "property_id", string="Inventarios")
     active = fields.Boolean(default=True)
 
@@ -102,6 +208,45 @@ class RentalProperty(models.Model):
         "rental.contract", string="Contrato vigente", compute="_compute_current_contract", store=False
     )
 
+    # Catálogo público (/rental/propiedades)
+    is_published = fields.Boolean("Publicada en el sitio", index=True, copy=False)
+    currency_id = fields.Many2one("res.currency", "Moneda", default=lambda self: self.env.company.currency_id)
+    listing_price = fields.Monetary("Precio publicado", currency_field="currency_id")
+    product_tmpl_id = fields.Many2one(
+        "product.template", "Producto del sitio", index=True, copy=False,
+        help="Producto de la tienda que publica esta propiedad (agenda de visitas y disponibilidad).",
+    )
+
+    # Texto combinado para la búsqueda difusa. Con pg_trgm disponible Odoo crea
+    # un índice GIN de trigramas; si no, queda un índice común.
+    search_text = fields.Char(
+        "Texto de búsqueda", compute="_compute_search_text", store=True, index="trigram"
+    )
+
+    @api.depends("name", "code", "map_address", "padron", "cadastral_account", "unit_number")
+    def _compute_search_text(self):
+        for rec in self:
+            parts = (rec.name, rec.code, rec.unit_number, rec.padron, rec.cadastral_account, rec.map_address)
+            rec.search_text = " ".join(p.strip() for p in parts if p and p.strip()).lower() or False
+
+    @api.model
+    def _name_search(self, name, domain=None, operator="ilike", limit=None, order=None):
+        """Autocompletado ordenado por similitud de trigramas.
+
+        Además de las coincidencias por subcadena acepta errores de tipeo
+        (operador % de pg_trgm). Sin la extensión se usa la búsqueda estándar.
+        """
+        name = (name or "").strip()
+        if not (name and operator == "ilike" and self.env.registry.has_trigram):
+            return super()._name_search(name, domain, operator, limit=limit, order=order)
+        column = SQL.identifier(self._table, "search_text")
+        query = self._search(domain or [], limit=limit)
+        query.add_where(SQL("(%s ILIKE %s OR %s %%%% %s)", column, f"%{escape_psql(name)}%", column, name.lower()))
+        query.order = SQL(
+            "similarity(%s, %s) DESC, %s", column, name.lower(), SQL.identifier(self._table, "id")
+        )
+        return query
+
     @api.depends("country_id", "city", "unit_number", "property_type_id", "property_type_id.code")
     def _compute_code(self):
         """Genera código sugerido ejemplo: PY-ASU-UMX"""
@@ -140,8 +285,14 @@ class RentalProperty(models.Model):
             if rec.property_structure == 'horizontal' and not rec.building_id:
                 raise ValidationError(_("Las propiedades horizontales deben estar relacionadas a un edificio."))
 
-    geo_latitude = fields.Float(string="Latitud")
-    geo_longitude = fields.Float(string="Longitud")
+    geo_latitude = fields.Float(string="Latitud", index=True)
+    geo_longitude = fields.Float(string="Longitud", index=True)
+    geo_near = fields.Char(
+        string="Cerca de",
+        compute="_compute_geo_near",
+        search="_search_geo_near",
+        help="Búsqueda por radio: [('geo_near', '=', 'latitud,longitud,radio_km')]",
+    )
     map_address = fields.Char(string="Dirección para mapa", compute="_compute_map_address", store=True)
 
     # NUEVO: iframe embebido
@@ -187,6 +338,370 @@ class RentalProperty(models.Model):
             if rec.city and rec.city.state_id != rec.state_id:
                 rec.city = False
 
+    # --- Búsqueda geográfica (sin servicios externos)
+    def _compute_geo_near(self):
+        self.geo_near = False
+
+    def _search_geo_near(self, operator, value):
+        if operator not in ("=", "ilike"):
+            raise UserError(_("Operador no soportado para la búsqueda por cercanía."))
+        if isinstance(value, str):
+            value = [v for v in value.replace(";", ",").split(",") if v.strip()]
+        try:
+            lat, lon, radius_km = (float(v) for v in value)
+        except (TypeError, ValueError):
+            raise UserError(_("Formato esperado: 'latitud,longitud,radio_km'."))
+        return [("id", "in", [pid for pid, _dist in self._geo_candidates(lat, lon, radius_km)])]
+
+    @api.model
+    def _geo_candidates(self, lat, lon, radius_km):
+        """Devuelve [(id, distancia_km)] ordenado por distancia.
+
+        Primero filtra por la caja envolvente (usa los índices de latitud y
+        longitud) y luego refina con haversine exacto en la misma consulta.
+        No aplica reglas de acceso: usar search_nearby() desde afuera.
+        """
+        if radius_km <= 0:
+            return []
+        self.flush_model(["geo_latitude", "geo_longitude"])
+
+        dlat = radius_km / KM_PER_DEGREE
+        params = {
+            "lat": lat,
+            "lon": lon,
+            "radius": radius_km,
+            "r": EARTH_RADIUS_KM,
+            "lat_min": lat - dlat,
+            "lat_max": lat + dlat,
+        }
+        where = ["p.geo_latitude BETWEEN %(lat_min)s AND %(lat_max)s"]
+
+        # Cerca de los polos o cruzando el antimeridiano no acotamos longitud
+        cos_lat = math.cos(math.radians(lat))
+        if cos_lat > 1e-6:
+            dlon = radius_km / (KM_PER_DEGREE * cos_lat)
+            if lon - dlon >= -180.0 and lon + dlon <= 180.0:
+                where.append("p.geo_longitude BETWEEN %(lon_min)s AND %(lon_max)s")
+                params.update(lon_min=lon - dlon, lon_max=lon + dlon)
+
+        # 0,0 es el valor por defecto: propiedad sin coordenadas cargadas
+        where.append("NOT (p.geo_latitude = 0 AND p.geo_longitude = 0)")
+
+        self.env.cr.execute("""
+            SELECT id, dist FROM (
+                SELECT p.id,
+                       2 * %%(r)s * asin(least(1.0, sqrt(
+                           power(sin(radians(p.geo_latitude - %%(lat)s) / 2), 2)
+                           + cos(radians(%%(lat)s)) * cos(radians(p.geo_latitude))
+                           * power(sin(radians(p.geo_longitude - %%(lon)s) / 2), 2)
+                       ))) AS dist
+                  FROM rental_property p
+                 WHERE %s
+            ) candidates
+            WHERE dist <= %%(radius)s
+            ORDER BY dist, id
+        """ % " AND ".join(where), params)
+        return self.env.cr.fetchall()
+
+    @api.model
+    def search_nearby(self, lat, lon, radius_km=2.0, domain=None, limit=None):
+        """Propiedades dentro de radius_km del punto, ordenadas por distancia."""
+        candidates = self._geo_candidates(lat, lon, radius_km)
+        if not candidates:
+            return self.browse()
+        order = {pid: idx for idx, (pid, _dist) in enumerate(candidates)}
+        records = self.search([("id", "in", list(order))] + list(domain or []))
+        records = records.sorted(key=lambda r: order[r.id])
+        return records[:limit] if limit else records
+
+    def get_nearby_properties(self, radius_km=2.0, same_type=True, limit=20):
+        """Unidades similares cercanas a esta propiedad (excluye la propia)."""
+        self.ensure_one()
+        if not (self.geo_latitude and self.geo_longitude):
+            return self.browse()
+        domain = [("id", "!=", self.id)]
+        if same_type:
+            domain.append(("property_type_id", "=", self.property_type_id.id))
+        return self.search_nearby(self.geo_latitude, self.geo_longitude, radius_km, domain=domain, limit=limit)
+
+    def action_view_nearby(self):
+        self.ensure_one()
+        if not (self.geo_latitude and self.geo_longitude):
+            raise UserError(_("Cargá latitud y longitud para buscar propiedades cercanas."))
+        nearby = self.get_nearby_properties()
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Propiedades cercanas"),
+            "res_model": "rental.property",
+            "view_mode": "list,form",
+            "domain": [("id", "in", nearby.ids)],
+        }
+
+    # --- Catálogo público
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._invalidate_catalog_cache()
+        # Un producto sin propiedad pudo quedar cacheado como "No vinculada"
+        invalidate_visit_pages(self.env.cr, visit_page_refs(product_tmpl_ids=records.product_tmpl_id.ids))
+        return records
+
+    def write(self, vals):
+        refs = visit_page_refs(self.ids, self.product_tmpl_id.ids)
+        res = super().write(vals)
+        self._invalidate_catalog_cache()
+        invalidate_visit_pages(self.env.cr, refs | visit_page_refs(product_tmpl_ids=self.product_tmpl_id.ids))
+        return res
+
+    def unlink(self):
+        refs = visit_page_refs(self.ids, self.product_tmpl_id.ids)
+        res = super().unlink()
+        self._invalidate_catalog_cache()
+        invalidate_visit_pages(self.env.cr, refs)
+        return res
+
+    @api.model
+    def _invalidate_catalog_cache(self):
+        """Descarta lo cacheado para el sitio cuando la transacción se confirma."""
+        catalog_facet_cache.invalidate_on_commit(self.env.cr)
+        shop_availability_cache.invalidate_on_commit(self.env.cr)
+
+    @api.model
+    def _catalog_where(self, filters):
+        """Condición SQL (alias p) de las propiedades listadas en el catálogo.
+
+        Se listan las publicadas y activas sin contrato vigente hoy. filters
+        admite type_id, city_id, rental_type, zone_type y price_bucket.
+        """
+        params = {
+            "today": fields.Date.context_today(self),
+            "bounds": CATALOG_PRICE_BOUNDS,
+            "type_id": filters.get("type_id"),
+            "city_id": filters.get("city_id"),
+            "rental_type": filters.get("rental_type"),
+            "zone_type": filters.get("zone_type"),
+            "price_bucket": filters.get("price_bucket"),
+        }
+        where = """
+                p.active AND p.is_published
+            AND NOT EXISTS (
+                    SELECT 1 FROM rental_contract c
+                     WHERE c.property_id = p.id
+                       AND c.state = 'active'
+                       AND c.start_date <= %(today)s
+                       AND (c.end_date IS NULL OR c.end_date >= %(today)s)
+                )
+            AND (%(type_id)s::int IS NULL OR p.property_type_id = %(type_id)s::int)
+            AND (%(city_id)s::int IS NULL OR p.city = %(city_id)s::int)
+            AND (%(rental_type)s::varchar IS NULL OR p.rental_type = %(rental_type)s::varchar)
+            AND (%(zone_type)s::varchar IS NULL OR p.zone_type = %(zone_type)s::varchar)
+            AND (%(price_bucket)s::int IS NULL
+                 OR width_bucket(p.listing_price, %(bounds)s::numeric[]) = %(price_bucket)s::int)
+        """
+        return where, params
+
+    @api.model
+    def _search_catalog(self, filters, after=None, limit=CATALOG_PAGE_SIZE):
+        """Página del catálogo por keyset (id descendente).
+
+        Devuelve (propiedades, hay_más). `after` es el último id de la página
+        anterior, así las páginas profundas cuestan lo mismo que la primera.
+        """
+        self.flush_model()
+        self.env["rental.contract"].flush_model(["property_id", "state", "start_date", "end_date"])
+        where, params = self._catalog_where(filters)
+        params.update(after=after, limit=limit + 1)
+        self.env.cr.execute("""
+            SELECT p.id FROM rental_property p
+             WHERE {where}
+               AND (%(after)s::int IS NULL OR p.id < %(after)s::int)
+             ORDER BY p.id DESC
+             LIMIT %(limit)s
+        """.format(where=where), params)
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        return self.browse(ids[:limit]), len(ids) > limit
+
+    @api.model
+    def _get_catalog_facets(self, filters):
+        """Conteos por tipo, ciudad, operación, zona y rango de precio.
+
+        Una sola consulta con GROUPING SETS sobre el conjunto filtrado. El
+        resultado (con etiquetas) se guarda en catalog_facet_cache.
+        """
+        dbname = self.env.cr.dbname
+        key = (tuple(sorted(filters.items())), fields.Date.context_today(self), self.env.lang)
+        facets = catalog_facet_cache.get(dbname, key)
+        if facets is not None:
+            return facets
+
+        self.flush_model()
+        self.env["rental.contract"].flush_model(["property_id", "state", "start_date", "end_date"])
+        where, params = self._catalog_where(filters)
+        self.env.cr.execute("""
+            SELECT GROUPING(p.property_type_id, p.city, p.rental_type, p.zone_type, price_bucket),
+                   p.property_type_id, p.city, p.rental_type, p.zone_type, price_bucket,
+                   COUNT(*)
+              FROM rental_property p,
+                   LATERAL (SELECT width_bucket(p.listing_price, %(bounds)s::numeric[]) AS price_bucket) b
+             WHERE {where}
+             GROUP BY GROUPING SETS (
+                (p.property_type_id), (p.city), (p.rental_type), (p.zone_type), (price_bucket), ()
+             )
+        """.format(where=where), params)
+
+        # El bit en 0 indica la columna agrupada en cada conjunto
+        sets = {0b01111: "type_id", 0b10111: "city_id", 0b11011: "rental_type", 0b11101: "zone_type",
+                0b11110: "price_bucket"}
+        counts = {name: {} for name in sets.values()}
+        total = 0
+        for row in self.env.cr.fetchall():
+            grouping, count = row[0], row[-1]
+            if grouping == 0b11111:
+                total = count
+                continue
+            name = sets[grouping]
+            value = row[1:6][list(sets).index(grouping)]
+            if value is not None:
+                counts[name][value] = count
+
+        types = self.env["rental.property.type"].sudo().browse(counts["type_id"])
+        cities = self.env["res.city"].sudo().browse(counts["city_id"])
+        labels = {
+            "type_id": {t.id: t.name for t in types},
+            "city_id": {c.id: c.name for c in cities},
+            "rental_type": dict(self._fields["rental_type"]._description_selection(self.env)),
+            "zone_type": dict(self._fields["zone_type"]._description_selection(self.env)),
+            "price_bucket": self._catalog_price_labels(),
+        }
+        facets = {"total": total}
+        for name, values in counts.items():
+            items = [(value, labels[name].get(value, str(value)), count) for value, count in values.items()]
+            # Los rangos de precio en orden; el resto, los más frecuentes primero
+            if name == "price_bucket":
+                facets[name] = sorted(items)
+            else:
+                facets[name] = sorted(items, key=lambda item: (-item[2], item[1]))
+        catalog_facet_cache.set(dbname, key, facets)
+        return facets
+
+    # --- Disponibilidad en la tienda (website_sale)
+    @api.model
+    def _get_shop_availability(self, product_tmpl_ids):
+        """Estado de alquiler de los productos de una página de la tienda.
+
+        Una sola consulta sin importar cuántos productos haya: propiedad
+        vinculada, próxima franja libre, franjas libres en los próximos 7 días
+        y contrato vigente. Devuelve {product_tmpl_id: {...}} solo para los
+        productos que tienen propiedad.
+        """
+        if not product_tmpl_ids:
+            return {}
+        self.flush_model(["product_tmpl_id", "active"])
+        self.env["rental.visit.slot"].flush_model(["property_id", "state", "start_datetime"])
+        self.env["rental.contract"].flush_model(["property_id", "state", "start_date", "end_date"])
+        now = fields.Datetime.now()
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (p.product_tmpl_id)
+                   p.product_tmpl_id, p.id, s.next_slot, s.week_slots, cur.id IS NOT NULL, cur.end_date
+              FROM rental_property p
+              LEFT JOIN LATERAL (
+                    SELECT MIN(vs.start_datetime) AS next_slot,
+                           COUNT(*) FILTER (WHERE vs.start_datetime < %(week_end)s) AS week_slots
+                      FROM rental_visit_slot vs
+                     WHERE vs.property_id = p.id
+                       AND vs.state = 'available'
+                       AND vs.start_datetime >= %(now)s
+                   ) s ON TRUE
+              LEFT JOIN LATERAL (
+                    SELECT c.id, c.end_date
+                      FROM rental_contract c
+                     WHERE c.property_id = p.id
+                       AND c.state = 'active'
+                       AND c.start_date <= %(today)s
+                       AND (c.end_date IS NULL OR c.end_date >= %(today)s)
+                     ORDER BY c.end_date DESC NULLS FIRST
+                     LIMIT 1
+                   ) cur ON TRUE
+             WHERE p.product_tmpl_id = ANY(%(tmpl_ids)s)
+               AND p.active
+             ORDER BY p.product_tmpl_id, p.id
+        """, {
+            "tmpl_ids": list(product_tmpl_ids),
+            "now": now,
+            "week_end": now + timedelta(days=7),
+            "today": fields.Date.context_today(self),
+        })
+        result = {}
+        for tmpl_id, property_id, next_slot, week_slots, rented, rented_until in self.env.cr.fetchall():
+            info = {
+                "property_id": property_id,
+                "next_slot": next_slot,
+                "week_slots": week_slots or 0,
+                "rented": rented,
+                "rented_until": rented_until,
+            }
+            info["badge"], info["badge_class"] = self._shop_badge(info)
+            result[tmpl_id] = info
+        return result
+
+    @api.model
+    def _visit_page_version(self, product_tmpl_id):
+        """Versión de la página "Agendar visita" de un producto; None si no existe.
+
+        Una consulta por índices: write_date del producto, la propiedad que
+        muestra la página (la misma que elige el portal) con su write_date,
+        y cantidad y último write_date de sus franjas. Cualquier alta, baja o
+        cambio de franja en cualquier worker cambia la versión.
+        """
+        self.flush_model(["product_tmpl_id", "active"])
+        self.env["rental.visit.slot"].flush_model(["property_id"])
+        self.env.cr.execute("""
+            SELECT t.write_date, p.id, p.write_date, s.slot_count, s.last_write
+              FROM product_template t
+              LEFT JOIN LATERAL (
+                    SELECT id, write_date
+                      FROM rental_property
+                     WHERE product_tmpl_id = t.id AND active
+                     ORDER BY id
+                     LIMIT 1
+                   ) p ON TRUE
+              LEFT JOIN LATERAL (
+                    SELECT COUNT(*) AS slot_count, MAX(write_date) AS last_write
+                      FROM rental_visit_slot
+                     WHERE property_id = p.id
+                   ) s ON TRUE
+             WHERE t.id = %s
+        """, [product_tmpl_id])
+        row = self.env.cr.fetchone()
+        return tuple(row) if row else None
+
+    @api.model
+    def _shop_badge(self, info):
+        if info["rented"]:
+            if info["rented_until"]:
+                return _("Alquilada hasta %s") % info["rented_until"].strftime("%m/%Y"), "text-bg-secondary"
+            return _("Alquilada"), "text-bg-secondary"
+        if info["week_slots"]:
+            return _("%s horarios de visita esta semana") % info["week_slots"], "text-bg-success"
+        if info["next_slot"]:
+            next_local = fields.Datetime.context_timestamp(self, info["next_slot"])
+            return _("Próxima visita: %s") % next_local.strftime("%d/%m"), "text-bg-info"
+        return False, False
+
+    @api.model
+    def _catalog_price_labels(self):
+        currency = self.env.company.currency_id
+        bounds = CATALOG_PRICE_BOUNDS
+        labels = {}
+        for idx in range(1, len(bounds)):
+            labels[idx] = _("%(low)s a %(high)s") % {
+                "low": currency.format(bounds[idx - 1]) if bounds[idx - 1] else "0",
+                "high": currency.format(bounds[idx]),
+            }
+        labels[len(bounds)] = _("Más de %s") % currency.format(bounds[-1])
+        return labels
+
+
 class RentalPropertyInventory(models.Model):
     _name = "rental.property.inventory"
     _description = "Inventario por fecha"
@@ -221,4 +736,40 @@ class RentalPropertyInventoryLine(models.Model):
     condition = fields.Selection([
         ("new","Nuevo"),("good","Bueno"),("fair","Regular"),("poor","Malo")
     ], string="Condición", default="good")
-    image = fields.Image("Foto (evidencia)")
+    image = fields.Image("Foto (evidencia)", max_width=1920, max_height=1920)
+    # Variantes reducidas, generadas al subir la foto: listas y PDF usan estas
+    image_256 = fields.Image("Foto (reporte)", related="image", max_width=256, max_height=256, store=True)
+    image_128 = fields.Image("Foto (miniatura)", related="image", max_width=128, max_height=128, store=True)
+    image_checksum = fields.Char(
+        "Checksum de la foto",
+        compute="_compute_image_checksum",
+        store=True,
+        index=True,
+        help="SHA1 del contenido. Coincide con el checksum del adjunto, por lo que "
+             "las fotos idénticas comparten un único archivo en el filestore.",
+    )
+    duplicate_image_count = fields.Integer(
+        "Foto repetida en",
+        compute="_compute_duplicate_image_count",
+        help="Cantidad de otras líneas (de cualquier inventario) con exactamente la misma foto.",
+    )
+
+    @api.depends("image")
+    def _compute_image_checksum(self):
+        for line in self:
+            line.image_checksum = hashlib.sha1(base64.b64decode(line.image)).hexdigest() if line.image else False
+
+    @api.depends("image_checksum")
+    def _compute_duplicate_image_count(self):
+        checksums = [c for c in self.mapped("image_checksum") if c]
+        counts = dict(self._read_group(
+            [("image_checksum", "in", checksums)], ["image_checksum"], ["__count"],
+        )) if checksums else {}
+        for line in self:
+            if not line.image_checksum:
+                line.duplicate_image_count = 0
+                continue
+            # La línea ya guardada con la misma foto cuenta en su propio grupo
+            own = 1 if line._origin.id and line._origin.image_checksum == line.image_checksum else 0
+            line.duplicate_image_count = max(counts.get(line.image_checksum, 0) - own, 0)
+
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from odoo import api, fields, models
+
+
+class RentalRentIndex(models.Model):
+    _name = "rental.rent.index"
+    _description = "Índice de ajuste de alquiler"
+    _order = "date desc, id desc"
+
+    name = fields.Char("Nombre", required=True)
+    date = fields.Date("Fecha de publicación", required=True, default=fields.Date.context_today)
+    rate = fields.Float("Variación (%)", required=True, digits=(6, 3))
+    notes = fields.Text("Notas")
+    active = fields.Boolean(default=True)
+
+
+class RentalRentAdjustment(models.Model):
+    _name = "rental.rent.adjustment"
+    _description = "Historial de ajustes de alquiler"
+    _order = "date desc, id desc"
+
+    contract_id = fields.Many2one("rental.contract", "Contrato", required=True, ondelete="cascade", index=True)
+    date = fields.Date("Fecha de vigencia", required=True)
+    old_amount = fields.Monetary("Monto anterior", currency_field="currency_id")
+    new_amount = fields.Monetary("Monto nuevo", currency_field="currency_id")
+    rate = fields.Float("Variación (%)", digits=(6, 3))
+    index_id = fields.Many2one("rental.rent.index", "Índice")
+    currency_id = fields.Many2one("res.currency", "Moneda", related="contract_id.currency_id")
+    user_id = fields.Many2one("res.users", "Aplicado por", default=lambda self: self.env.user)
+    # Sin fecha futura el ajuste se aplica al crearlo; el historial previo ya estaba aplicado
+    state = fields.Selection(
+        [("pending", "Programado"), ("applied", "Aplicado"), ("discarded", "Descartado")],
+        string="Estado",
+        required=True,
+        default="applied",
+        index=True,
+    )
+
+    def _apply_to_contracts(self):
+        """Pasa new_amount al contrato con un write por monto resultante."""
+        by_amount = defaultdict(lambda: self.env["rental.contract"])
+        for adjustment in self:
+            by_amount[adjustment.new_amount] |= adjustment.contract_id
+        for amount, contracts in by_amount.items():
+            contracts.write({"rent_amount": amount})
+        self.contract_id._refresh_rent_clauses()
+
+    @api.model
+    def cron_apply_pending(self):
+        """Aplica los ajustes programados cuya fecha de vigencia ya llegó.
+
+        Se descartan los de contratos que ya no están activos o cuyo monto
+        cambió desde que se programaron (otro ajuste o una edición manual).
+        """
+        pending = self.search([
+            ("state", "=", "pending"),
+            ("date", "<=", fields.Date.context_today(self)),
+        ], order="date, id")
+        todo = discarded = self.browse()
+        seen = set()
+        for adjustment in pending:
+            contract = adjustment.contract_id
+            # Un ajuste por contrato y corrida: el siguiente se compara con el monto ya ajustado
+            if contract.id in seen:
+                continue
+            seen.add(contract.id)
+            if contract.state != "active" or adjustment.currency_id.compare_amounts(
+                contract.rent_amount, adjustment.old_amount
+            ):
+                discarded |= adjustment
+            else:
+                todo |= adjustment
+        discarded.state = "discarded"
+        todo._apply_to_contracts()
+        todo.state = "applied"
+        return todo
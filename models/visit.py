@@ -1,8 +1,20 @@
 # -*- coding: utf-8 -*-
-from datetime import timedelta
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import pytz
+from markupsafe import Markup, escape
 
 from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
+
+from .perf_sample import perf_sampled
+from .property import invalidate_visit_pages, shop_availability_cache, visit_page_refs
+
+# Rango máximo (días) que acepta get_agent_calendar()
+CALENDAR_MAX_DAYS = 92
+# Avisos enviados por corrida del cron de notificaciones
+NOTIFICATION_BATCH_SIZE = 200
 
 
 class RentalVisitSlot(models.Model):
@@ -15,15 +27,18 @@ class RentalVisitSlot(models.Model):
         "res.partner",
         string="Agente",
         required=True,
+        index=True,
     )
     property_id = fields.Many2one(
         "rental.property",
         string="Propiedad",
         required=True,
+        index=True,
     )
     start_datetime = fields.Datetime(
         string="Inicio",
         required=True,
+        index=True,
     )
     end_datetime = fields.Datetime(
         string="Fin",
@@ -48,6 +63,14 @@ class RentalVisitSlot(models.Model):
         string="Visitas asociadas",
     )
 
+    blackout_id = fields.Many2one(
+        "rental.visit.blackout",
+        string="Bloqueo",
+        index=True,
+        ondelete="set null",
+        readonly=True,
+    )
+
     is_available = fields.Boolean(
         string="Disponible para portal",
         compute="_compute_is_available",
@@ -78,6 +101,27 @@ class RentalVisitSlot(models.Model):
 
             slot.name = " - ".join([p for p in parts if p])
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        slots = super().create(vals_list)
+        shop_availability_cache.invalidate_on_commit(self.env.cr)
+        invalidate_visit_pages(self.env.cr, visit_page_refs(slots.property_id.ids))
+        return slots
+
+    def write(self, vals):
+        property_ids = set(self.property_id.ids)
+        res = super().write(vals)
+        shop_availability_cache.invalidate_on_commit(self.env.cr)
+        invalidate_visit_pages(self.env.cr, visit_page_refs(property_ids | set(self.property_id.ids)))
+        return res
+
+    def unlink(self):
+        refs = visit_page_refs(self.property_id.ids)
+        res = super().unlink()
+        shop_availability_cache.invalidate_on_commit(self.env.cr)
+        invalidate_visit_pages(self.env.cr, refs)
+        return res
+
     @api.depends("state")
     def _compute_is_available(self):
         for slot in self:
@@ -95,6 +139,116 @@ class RentalVisitSlot(models.Model):
                     _("La hora de fin debe ser posterior a la hora de inicio.")
                 )
 
+    # -----------------------
+    # Calendario de agentes
+    # -----------------------
+    @api.model
+    def get_agent_calendar(self, date_from, date_to, agent_ids=None):
+        """Ocupación por agente y por día (zona horaria del usuario), inclusive.
+
+        Una sola consulta une franjas y visitas, las parte en días locales y
+        agrega minutos por tipo:
+          - free: franjas disponibles (con sus ventanas HH:MM),
+          - reserved / blocked: franjas reservadas o bloqueadas,
+          - pending: visitas solicitadas, booked: confirmadas o realizadas.
+        Las franjas "booked" no se suman: su tiempo ya está en las visitas.
+
+        Devuelve {agent_id: {"name": str, "days": {"AAAA-MM-DD": {...}}}}.
+        """
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        if not date_from or not date_to or date_to < date_from:
+            raise UserError(_("Rango de fechas inválido."))
+        if (date_to - date_from).days >= CALENDAR_MAX_DAYS:
+            raise UserError(_("El rango no puede superar %s días.") % CALENDAR_MAX_DAYS)
+
+        self.check_access("read")
+        self.env["rental.visit"].check_access("read")
+        self.flush_model(["agent_id", "start_datetime", "end_datetime", "state"])
+        self.env["rental.visit"].flush_model(["agent_id", "start_datetime", "end_datetime", "state"])
+
+        self.env.cr.execute("""
+            WITH bounds AS (
+                SELECT %(date_from)s::timestamp AS lo,
+                       %(date_to)s::timestamp + interval '1 day' AS hi
+            ), items AS (
+                SELECT s.agent_id,
+                       CASE s.state WHEN 'available' THEN 'free' ELSE s.state END AS kind,
+                       s.start_datetime AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s AS ls,
+                       s.end_datetime AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s AS le
+                  FROM rental_visit_slot s
+                 WHERE s.state IN ('available', 'reserved', 'blocked')
+                   AND s.start_datetime < %(utc_hi)s AND s.end_datetime > %(utc_lo)s
+                   AND (%(agent_ids)s::int[] IS NULL OR s.agent_id = ANY(%(agent_ids)s::int[]))
+                UNION ALL
+                SELECT v.agent_id,
+                       CASE v.state WHEN 'requested' THEN 'pending' ELSE 'booked' END,
+                       v.start_datetime AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s,
+                       v.end_datetime AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s
+                  FROM rental_visit v
+                 WHERE v.state IN ('requested', 'confirmed', 'done')
+                   AND v.start_datetime < %(utc_hi)s AND v.end_datetime > %(utc_lo)s
+                   AND (%(agent_ids)s::int[] IS NULL OR v.agent_id = ANY(%(agent_ids)s::int[]))
+            ), pieces AS (
+                -- Cada ítem recortado a cada día local que toca (y al rango pedido)
+                SELECT i.agent_id, i.kind, d::date AS day,
+                       greatest(i.ls, d, b.lo) AS ps,
+                       least(i.le, d + interval '1 day', b.hi) AS pe
+                  FROM items i
+                 CROSS JOIN bounds b
+                 CROSS JOIN LATERAL generate_series(
+                       date_trunc('day', greatest(i.ls, b.lo)),
+                       least(i.le, b.hi) - interval '1 microsecond',
+                       interval '1 day') AS d
+            )
+            SELECT agent_id, day,
+                   COALESCE(SUM(EXTRACT(EPOCH FROM pe - ps)) FILTER (WHERE kind = 'free'), 0) / 60,
+                   COALESCE(SUM(EXTRACT(EPOCH FROM pe - ps)) FILTER (WHERE kind = 'reserved'), 0) / 60,
+                   COALESCE(SUM(EXTRACT(EPOCH FROM pe - ps)) FILTER (WHERE kind = 'blocked'), 0) / 60,
+                   COALESCE(SUM(EXTRACT(EPOCH FROM pe - ps)) FILTER (WHERE kind = 'pending'), 0) / 60,
+                   COALESCE(SUM(EXTRACT(EPOCH FROM pe - ps)) FILTER (WHERE kind = 'booked'), 0) / 60,
+                   COUNT(*) FILTER (WHERE kind IN ('pending', 'booked')),
+                   -- to_char no da "24:00": una ventana que llega al fin del día termina en 00:00
+                   COALESCE(json_agg(json_build_array(to_char(ps, 'HH24:MI'), to_char(pe, 'HH24:MI'))
+                                     ORDER BY ps) FILTER (WHERE kind = 'free'), '[]')
+              FROM pieces
+             WHERE pe > ps
+             GROUP BY agent_id, day
+             ORDER BY agent_id, day
+        """, self._calendar_params(date_from, date_to, agent_ids))
+
+        calendar = {}
+        for agent_id, day, free, reserved, blocked, pending, booked, visits, windows in self.env.cr.fetchall():
+            days = calendar.setdefault(agent_id, {"name": "", "days": {}})["days"]
+            days[fields.Date.to_string(day)] = {
+                "free_minutes": round(free),
+                "reserved_minutes": round(reserved),
+                "blocked_minutes": round(blocked),
+                "pending_minutes": round(pending),
+                "booked_minutes": round(booked),
+                "visit_count": visits,
+                "free_windows": windows,
+            }
+        for agent in self.env["res.partner"].browse(calendar).sudo():
+            calendar[agent.id]["name"] = agent.name
+        return calendar
+
+    @api.model
+    def _calendar_params(self, date_from, date_to, agent_ids):
+        tz = self.env.context.get("tz") or self.env.user.tz or "UTC"
+        local_lo = datetime.combine(date_from, time.min)
+        local_hi = datetime.combine(date_to + timedelta(days=1), time.min)
+        zone = pytz.timezone(tz)
+        # Prefiltro en UTC (usa los índices); el recorte fino es en hora local
+        return {
+            "tz": tz,
+            "date_from": date_from,
+            "date_to": date_to,
+            "utc_lo": zone.localize(local_lo).astimezone(pytz.UTC).replace(tzinfo=None),
+            "utc_hi": zone.localize(local_hi).astimezone(pytz.UTC).replace(tzinfo=None),
+            "agent_ids": list(agent_ids) if agent_ids else None,
+        }
+
 
 class RentalVisit(models.Model):
     _name = "rental.visit"
@@ -117,6 +271,7 @@ class RentalVisit(models.Model):
         "res.partner",
         string="Agente",
         required=True,
+        index=True,
     )
     customer_id = fields.Many2one(
         "res.partner",
@@ -136,6 +291,7 @@ class RentalVisit(models.Model):
     start_datetime = fields.Datetime(
         string="Inicio",
         required=True,
+        index=True,
     )
     end_datetime = fields.Datetime(
         string="Fin",
@@ -229,35 +385,54 @@ class RentalVisit(models.Model):
     # -----------------------
     # Acciones de workflow
     # -----------------------
+    @perf_sampled("rental.visit.action_confirm")
     def action_confirm(self):
-        Slot = self.env["rental.visit.slot"]
-        for visit in self:
-            visit.state = "confirmed"
-
+        """Confirma en lote: un write de estado, un create con los fragmentos
+        libres de todas las franjas y un write para marcarlas ocupadas.
+
+        Si varias visitas comparten franja, solo la primera la divide (igual
+        que al confirmarlas de a una). Los avisos al cliente y al agente se
+        encolan para el cron de notificaciones.
+        """
+        # Las ya confirmadas, realizadas o canceladas no se tocan: volver a
+        # confirmar no debe partir franjas ni reenviar avisos
+        visits = self.filtered(lambda v: v.state == "requested")
+        if not visits:
+            return
+        visits.write({"state": "confirmed"})
+
+        fragment_vals = []
+        booked_slots = self.env["rental.visit.slot"]
+        for visit in visits:
             slot = visit.slot_id
-            if slot and slot.state in ("available", "reserved"):
-                start = slot.start_datetime
-                end = slot.end_datetime
-                vs = visit.start_datetime
-                ve = visit.end_datetime
-
-                common_vals = {
-                    "agent_id": slot.agent_id.id,
-                    "property_id": slot.property_id.id,
-                    "state": "available",
-                }
-
-                # Parte antes de la visita
-                if vs > start:
-                    Slot.create(dict(common_vals, start_datetime=start, end_datetime=vs))
-
-                # Parte después de la visita
-                if ve < end:
-                    Slot.create(dict(common_vals, start_datetime=ve, end_datetime=end))
-
-                # La franja original queda "booked" (ocupada por esta visita)
-                slot.state = "booked"
-
+            if not slot or slot.state not in ("available", "reserved") or slot in booked_slots:
+                continue
+            common_vals = {
+                "agent_id": slot.agent_id.id,
+                "property_id": slot.property_id.id,
+                "state": "available",
+            }
+            # Parte antes de la visita
+            if visit.start_datetime > slot.start_datetime:
+                fragment_vals.append(dict(
+                    common_vals, start_datetime=slot.start_datetime, end_datetime=visit.start_datetime
+                ))
+            # Parte después de la visita
+            if visit.end_datetime < slot.end_datetime:
+                fragment_vals.append(dict(
+                    common_vals, start_datetime=visit.end_datetime, end_datetime=slot.end_datetime
+                ))
+            booked_slots |= slot
+
+        if fragment_vals:
+            self.env["rental.visit.slot"].create(fragment_vals)
+        # La franja original queda "booked" (ocupada por la visita)
+        if booked_slots:
+            booked_slots.write({"state": "booked"})
+
+        self.env["rental.visit.notification"]._enqueue(visits, "confirmed")
+
+    @perf_sampled("rental.visit.action_cancel")
     def action_cancel(self):
         Slot = self.env["rental.visit.slot"]
         for visit in self:
@@ -275,7 +450,254 @@ class RentalVisit(models.Model):
 
             visit.state = "cancelled"
 
+    @perf_sampled("rental.visit.action_mark_done")
     def action_mark_done(self):
         for visit in self:
             visit.state = "done"
             # La franja original ya quedó en booked, sirve como histórico
+
+
+class RentalVisitNotification(models.Model):
+    _name = "rental.visit.notification"
+    _description = "Aviso de visita pendiente de envío"
+    _order = "id"
+
+    visit_id = fields.Many2one("rental.visit", "Visita", required=True, ondelete="cascade")
+    partner_id = fields.Many2one("res.partner", "Destinatario", required=True)
+    role = fields.Selection([("customer", "Cliente"), ("agent", "Agente")], string="Rol", required=True)
+    event = fields.Selection([("confirmed", "Visita confirmada")], string="Evento", required=True)
+    state = fields.Selection(
+        [("pending", "Pendiente"), ("sent", "Enviado"), ("skipped", "Sin correo")],
+        string="Estado",
+        default="pending",
+        required=True,
+        index=True,
+    )
+    mail_id = fields.Many2one("mail.mail", "Correo", readonly=True)
+
+    @api.model
+    def _enqueue(self, visits, event):
+        vals_list = []
+        for visit in visits:
+            for role, partner in (("customer", visit.customer_id), ("agent", visit.agent_id)):
+                if partner:
+                    vals_list.append({
+                        "visit_id": visit.id,
+                        "partner_id": partner.id,
+                        "role": role,
+                        "event": event,
+                    })
+        return self.create(vals_list)
+
+    def _prepare_mail_vals(self):
+        self.ensure_one()
+        visit = self.visit_id
+        partner = self.partner_id
+        tz = pytz.timezone(partner.tz or self.env.user.tz or "UTC")
+        start = pytz.UTC.localize(visit.start_datetime).astimezone(tz)
+        end = pytz.UTC.localize(visit.end_datetime).astimezone(tz)
+        when = "%s, %s a %s" % (start.strftime("%d/%m/%Y"), start.strftime("%H:%M"), end.strftime("%H:%M"))
+        if self.role == "customer":
+            intro = _("Tu visita a la propiedad %s fue confirmada.") % visit.property_id.name
+            other = _("Agente: %s") % visit.agent_id.name
+        else:
+            intro = _("Tenés una visita confirmada en la propiedad %s.") % visit.property_id.name
+            other = _("Cliente: %s") % visit.customer_id.name
+        body = Markup("<p>%s</p><p>%s<br/>%s</p>") % (escape(intro), escape(when), escape(other))
+        return {
+            "subject": _("Visita confirmada - %s") % visit.property_id.name,
+            "body_html": body,
+            "recipient_ids": [(4, partner.id)],
+            "auto_delete": True,
+        }
+
+    @api.model
+    def cron_send_notifications(self, batch_size=NOTIFICATION_BATCH_SIZE):
+        """Pasa los avisos pendientes a mail.mail; la cola de correo los envía."""
+        pending = self.search([("state", "=", "pending")], limit=batch_size)
+        pending.fetch(["visit_id", "partner_id", "role"])
+        without_email = pending.filtered(lambda n: not n.partner_id.email)
+        without_email.write({"state": "skipped"})
+
+        to_send = pending - without_email
+        if not to_send:
+            return
+        mails = self.env["mail.mail"].sudo().create([n._prepare_mail_vals() for n in to_send])
+        for notification, mail in zip(to_send, mails):
+            notification.write({"state": "sent", "mail_id": mail.id})
+        if len(pending) == batch_size:
+            self.env.ref("sga_property_rental.ir_cron_send_visit_notifications")._trigger()
+
+    @api.autovacuum
+    def _gc_sent_notifications(self):
+        limit = fields.Datetime.now() - timedelta(days=30)
+        self.search([("state", "!=", "pending"), ("create_date", "<", limit)]).unlink()
+
+
+class RentalVisitBlackout(models.Model):
+    """Bloqueo de agenda: feriados, licencias de agentes, mantenimiento.
+
+    Al aplicarlo, las franjas libres que se superponen con el período quedan
+    partidas en antes / bloqueada / después. Las reservadas, confirmadas o
+    con visitas pedidas no se tocan y se informan como conflictos. Al borrar
+    un bloqueo aplicado, sus franjas vuelven a estar disponibles.
+    """
+    _name = "rental.visit.blackout"
+    _description = "Bloqueo de agenda de visitas"
+    _order = "start_datetime desc"
+
+    name = fields.Char("Motivo", required=True)
+    kind = fields.Selection(
+        [
+            ("holiday", "Feriado"),
+            ("leave", "Licencia de agente"),
+            ("maintenance", "Mantenimiento"),
+            ("other", "Otro"),
+        ],
+        string="Tipo",
+        default="holiday",
+        required=True,
+    )
+    start_datetime = fields.Datetime("Desde", required=True)
+    end_datetime = fields.Datetime("Hasta", required=True)
+    agent_ids = fields.Many2many(
+        "res.partner",
+        string="Agentes",
+        help="Dejar vacío para bloquear a todos los agentes.",
+    )
+    property_ids = fields.Many2many(
+        "rental.property",
+        string="Propiedades",
+        help="Junto con los edificios: se bloquean las propiedades indicadas y las "
+             "unidades de los edificios. Ambos vacíos = todas las propiedades.",
+    )
+    building_ids = fields.Many2many("rental.building", string="Edificios")
+    state = fields.Selection(
+        [("draft", "Borrador"), ("applied", "Aplicado")],
+        string="Estado",
+        default="draft",
+        required=True,
+    )
+    slot_ids = fields.One2many("rental.visit.slot", "blackout_id", string="Franjas bloqueadas", readonly=True)
+    blocked_count = fields.Integer("Franjas bloqueadas", compute="_compute_blocked_count")
+    conflict_slot_ids = fields.Many2many(
+        "rental.visit.slot",
+        "rental_visit_blackout_conflict_rel",
+        "blackout_id",
+        "slot_id",
+        string="Franjas en conflicto",
+        readonly=True,
+        help="Franjas reservadas, confirmadas o con visitas pendientes dentro del período; "
+             "hay que resolverlas a mano.",
+    )
+
+    @api.constrains("start_datetime", "end_datetime")
+    def _check_datetimes(self):
+        for blackout in self:
+            if blackout.end_datetime <= blackout.start_datetime:
+                raise ValidationError(_("El fin del bloqueo debe ser posterior al inicio."))
+
+    def unlink(self):
+        # Sin esto las franjas quedarían bloqueadas para siempre y sin vínculo
+        self.slot_ids.filtered(lambda s: s.state == "blocked").write({"state": "available"})
+        return super().unlink()
+
+    def _compute_blocked_count(self):
+        counts = dict(self.env["rental.visit.slot"]._read_group(
+            [("blackout_id", "in", self.ids)], ["blackout_id"], ["__count"]
+        ))
+        for blackout in self:
+            blackout.blocked_count = counts.get(blackout, 0)
+
+    def _fetch_overlapping_slots(self):
+        """Franjas que se superponen con el bloqueo, en una sola consulta.
+
+        Quedan bloqueadas (FOR UPDATE) hasta el fin de la transacción para
+        que nadie las confirme mientras se parten.
+        """
+        self.ensure_one()
+        self.env["rental.visit.slot"].flush_model(
+            ["agent_id", "property_id", "start_datetime", "end_datetime", "state"]
+        )
+        self.env["rental.property"].flush_model(["building_id"])
+        self.env["rental.visit"].flush_model(["slot_id", "state"])
+        self.env.cr.execute("""
+            SELECT s.id, s.agent_id, s.property_id, s.start_datetime, s.end_datetime, s.state,
+                   EXISTS (SELECT 1 FROM rental_visit v
+                            WHERE v.slot_id = s.id AND v.state IN ('requested', 'confirmed'))
+              FROM rental_visit_slot s
+              JOIN rental_property p ON p.id = s.property_id
+             WHERE s.start_datetime < %(end)s
+               AND s.end_datetime > %(start)s
+               AND s.state IN ('available', 'reserved', 'booked')
+               AND (%(agent_ids)s::int[] IS NULL OR s.agent_id = ANY(%(agent_ids)s::int[]))
+               AND ((%(property_ids)s::int[] IS NULL AND %(building_ids)s::int[] IS NULL)
+                    OR s.property_id = ANY(%(property_ids)s::int[])
+                    OR p.building_id = ANY(%(building_ids)s::int[]))
+             ORDER BY s.id
+               FOR UPDATE OF s
+        """, {
+            "start": self.start_datetime,
+            "end": self.end_datetime,
+            "agent_ids": self.agent_ids.ids or None,
+            "property_ids": self.property_ids.ids or None,
+            "building_ids": self.building_ids.ids or None,
+        })
+        return self.env.cr.fetchall()
+
+    def _split_slots(self, rows):
+        """Parte en memoria las franjas de _fetch_overlapping_slots().
+
+        Devuelve (fragmentos libres a crear, {cambios: ids a bloquear},
+        ids en conflicto). La fila original pasa a ser la parte bloqueada,
+        recortada a los límites del bloqueo; como casi todas comparten esos
+        límites, los writes se agrupan por valores iguales.
+        """
+        self.ensure_one()
+        start, end = self.start_datetime, self.end_datetime
+        fragment_vals = []
+        block_groups = defaultdict(list)
+        conflict_ids = []
+        for slot_id, agent_id, property_id, slot_start, slot_end, state, has_visits in rows:
+            # Una franja libre con una visita pedida o confirmada tampoco se parte:
+            # la visita quedaría fuera de su franja
+            if state != "available" or has_visits:
+                conflict_ids.append(slot_id)
+                continue
+            common_vals = {"agent_id": agent_id, "property_id": property_id, "state": "available"}
+            changes = {}
+            # Parte antes del bloqueo
+            if slot_start < start:
+                fragment_vals.append(dict(common_vals, start_datetime=slot_start, end_datetime=start))
+                changes["start_datetime"] = start
+            # Parte después del bloqueo
+            if slot_end > end:
+                fragment_vals.append(dict(common_vals, start_datetime=end, end_datetime=slot_end))
+                changes["end_datetime"] = end
+            block_groups[tuple(sorted(changes.items()))].append(slot_id)
+        return fragment_vals, block_groups, conflict_ids
+
+    @perf_sampled("rental.visit.blackout.action_apply")
+    def action_apply(self):
+        """Bloquea las franjas del período: un create con todos los fragmentos
+        libres y un write por cada combinación distinta de límites."""
+        Slot = self.env["rental.visit.slot"]
+        for blackout in self.filtered(lambda b: b.state == "draft"):
+            fragment_vals, block_groups, conflict_ids = blackout._split_slots(
+                blackout._fetch_overlapping_slots()
+            )
+            if fragment_vals:
+                Slot.create(fragment_vals)
+            for changes, slot_ids in block_groups.items():
+                Slot.browse(slot_ids).write(dict(changes, state="blocked", blackout_id=blackout.id))
+            blackout.write({"state": "applied", "conflict_slot_ids": [(6, 0, conflict_ids)]})
+
+    def action_view_slots(self):
+        self.ensure_one()
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Franjas bloqueadas"),
+            "res_model": "rental.visit.slot",
+            "view_mode": "list,form",
+            "domain": [("blackout_id", "=", self.id)],
+        }
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+
+class VersionedTTLCache:
+    """Caché en memoria del proceso, por base de datos, con vencimiento.
+
+    invalidate() sube la versión de la base: las entradas anteriores dejan de
+    usarse de inmediato en este proceso. Los demás workers las descartan al
+    vencer el TTL, por eso solo sirve para datos que toleran unos segundos de
+    atraso (conteos, listados públicos).
+    """
+
+    def __init__(self, ttl, max_size=512):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def _full_key(self, dbname, key):
+        return (dbname, self._versions.get(dbname, 0), key)
+
+    def get(self, dbname, key):
+        with self._lock:
+            entry = self._data.get(self._full_key(dbname, key))
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[self._full_key(dbname, key)]
+                return None
+            return value
+
+    def set(self, dbname, key, value):
+        with self._lock:
+            if len(self._data) >= self.max_size:
+                self._evict()
+            self._data[self._full_key(dbname, key)] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, dbname):
+        with self._lock:
+            self._versions[dbname] = self._versions.get(dbname, 0) + 1
+            for full_key in [k for k in self._data if k[0] == dbname]:
+                del self._data[full_key]
+
+    def invalidate_on_commit(self, cr):
+        """Invalida cuando la transacción de `cr` se confirma (una vez por transacción)."""
+        flag = ("sga_property_rental.cache", id(self))
+        if not cr.postcommit.data.get(flag):
+            cr.postcommit.data[flag] = True
+            dbname = cr.dbname
+            cr.postcommit.add(lambda: self.invalidate(dbname))
+
+    def discard(self, dbname, match):
+        """Descarta en este proceso las entradas de la base con match(key, value) verdadero."""
+        with self._lock:
+            for full_key in [k for k, (_e, v) in self._data.items() if k[0] == dbname and match(k[2], v)]:
+                del self._data[full_key]
+
+    def discard_on_commit(self, cr, match, refs):
+        """Como discard(), al confirmarse la transacción de `cr`.
+
+        `refs` se acumula durante la transacción y se pasa como tercer
+        argumento: match(key, value, refs). Hay un solo descarte por commit
+        y por función `match`.
+        """
+        flag = ("sga_property_rental.cache.discard", id(self), match)
+        pending = cr.postcommit.data.get(flag)
+        if pending is None:
+            pending = cr.postcommit.data[flag] = set()
+            dbname = cr.dbname
+            cr.postcommit.add(lambda: self.discard(dbname, lambda key, value: match(key, value, pending)))
+        pending.update(refs)
+
+    def _evict(self):
+        # Primero las vencidas; si no alcanza, la mitad más próxima a vencer
+        now = time.monotonic()
+        expired = [k for k, (expires, _v) in self._data.items() if expires < now]
+        if not expired:
+            expired = sorted(self._data, key=lambda k: self._data[k][0])[: self.max_size // 2]
+        for full_key in expired:
+            del self._data[full_key]
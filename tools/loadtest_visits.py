@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Prueba de carga de /rental/agendar-visita/<product_id> (sin conexión a internet).
+
+Siembra propiedades, productos y franjas por XML-RPC en una base local,
+lanza N clientes concurrentes que mezclan GET (ver franjas) y POST (pedir
+visita, con sesión y token CSRF propios) y al final informa:
+
+  - rendimiento (req/s) y latencia p50/p95/p99 por tipo de pedido,
+  - tasa de errores y de conflictos (visitas superpuestas del agente),
+  - consultas SQL y tiempo de servidor por pedido, leídos de
+    rental.perf.sample (el muestreo se pone en 1.0 durante la prueba).
+
+Solo usa la biblioteca estándar. Ejemplos:
+
+  # Contra un servidor ya levantado
+  python3 tools/loadtest_visits.py --db rental_test --clients 30 --duration 60
+
+  # Levanta odoo-bin, instala el módulo en la base y lo detiene al terminar
+  python3 tools/loadtest_visits.py --db rental_test --odoo-bin ~/odoo/odoo-bin \\
+      --addons-path ~/odoo/addons,~/custom --workers 4
+
+Los registros sembrados llevan el prefijo LOADTEST; --cleanup los borra.
+"""
+import argparse
+import http.cookiejar
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import xmlrpc.client
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+PREFIX = "LOADTEST"
+OPERATION = "portal_schedule_visit"
+SAMPLE_RATE_PARAM = "sga_property_rental.perf_sample_rate"
+
+CSRF_RE = re.compile(r'name="csrf_token"\s+value="([^"]+)"')
+SLOT_RE = re.compile(r'<option\s+value="(\d+)"')
+SUCCESS_MARK = "fue enviada correctamente"
+CONFLICT_MARKS = ("ya tiene una visita", "could not serialize", "concurrent update")
+
+
+# ---------------------------------------------------------------- XML-RPC
+class Rpc:
+    def __init__(self, url, db, login, password):
+        self.db = db
+        self.password = password
+        common = xmlrpc.client.ServerProxy("%s/xmlrpc/2/common" % url, allow_none=True)
+        self.uid = common.authenticate(db, login, password, {})
+        if not self.uid:
+            raise SystemExit("No se pudo autenticar %s en la base %s" % (login, db))
+        self.models = xmlrpc.client.ServerProxy("%s/xmlrpc/2/object" % url, allow_none=True)
+
+    def __call__(self, model, method, *args, **kwargs):
+        return self.models.execute_kw(self.db, self.uid, self.password, model, method, list(args), kwargs)
+
+
+def wait_for_server(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen("%s/web/login" % url, timeout=5).read()
+            return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(1)
+    raise SystemExit("El servidor no respondió en %s s" % timeout)
+
+
+def spawn_odoo(args):
+    cmd = [
+        args.odoo_bin,
+        "-d", args.db,
+        "-i", "sga_property_rental",
+        "--http-port", str(urllib.parse.urlparse(args.url).port or 8069),
+        "--workers", str(args.workers),
+        "--without-demo", "all",
+        "--log-level", "warn",
+    ]
+    if args.addons_path:
+        cmd += ["--addons-path", args.addons_path]
+    if args.db_host:
+        cmd += ["--db_host", args.db_host]
+    print("Levantando: %s" % " ".join(cmd))
+    return subprocess.Popen(cmd)
+
+
+# ---------------------------------------------------------------- Siembra
+def seed(rpc, n_properties, slots_per_property, n_agents):
+    """Crea propiedades con producto y franjas libres. Devuelve (productos, franjas)."""
+    type_id = rpc("rental.property.type", "create", {"name": "%s tipo" % PREFIX, "code": "LT"})
+    owner_id = rpc("res.partner", "create", {"name": "%s propietario" % PREFIX})
+    agent_ids = rpc("res.partner", "create", [
+        {"name": "%s agente %s" % (PREFIX, i), "email": "agente%s@loadtest.invalid" % i}
+        for i in range(n_agents)
+    ])
+    product_ids = rpc("product.template", "create", [
+        {"name": "%s propiedad %s" % (PREFIX, i), "type": "service", "sale_ok": True}
+        for i in range(n_properties)
+    ])
+    prop_fields = rpc("rental.property", "fields_get", attributes=["type"])
+    prop_vals = []
+    for i, product_id in enumerate(product_ids):
+        vals = {
+            "name": "%s propiedad %s" % (PREFIX, i),
+            "property_type_id": type_id,
+            "property_structure": "vertical",
+            "street1": "Calle de prueba %s" % i,
+            "owner_id": owner_id,
+        }
+        # Con el vínculo producto-propiedad cada producto tiene su propia agenda
+        if "product_tmpl_id" in prop_fields:
+            vals["product_tmpl_id"] = product_id
+        prop_vals.append(vals)
+    property_ids = rpc("rental.property", "create", prop_vals)
+
+    # Franjas de 2 h en días hábiles desde mañana (UTC)
+    base = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    slot_vals = []
+    for idx, property_id in enumerate(property_ids):
+        for n in range(slots_per_property):
+            start = base + timedelta(days=n // 3, hours=2 * (n % 3))
+            slot_vals.append({
+                "agent_id": agent_ids[(idx + n) % len(agent_ids)],
+                "property_id": property_id,
+                "start_datetime": start.strftime("%Y-%m-%d %H:%M:%S"),
+                "end_datetime": (start + timedelta(hours=2)).strftime("%Y-%m-%d %H:%M:%S"),
+                "state": "available",
+            })
+    slot_ids = rpc("rental.visit.slot", "create", slot_vals)
+    slots = {
+        slot_id: (
+            datetime.strptime(vals["start_datetime"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc),
+            datetime.strptime(vals["end_datetime"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc),
+        )
+        for slot_id, vals in zip(slot_ids, slot_vals)
+    }
+    print("Sembrado: %s propiedades, %s agentes, %s franjas" % (len(property_ids), n_agents, len(slot_ids)))
+    return product_ids, slots
+
+
+def cleanup(rpc):
+    like = [("name", "=like", PREFIX + "%")]
+    property_ids = rpc("rental.property", "search", like)
+    visit_ids = rpc("rental.visit", "search", [("property_id", "in", property_ids)])
+    slot_ids = rpc("rental.visit.slot", "search", [("property_id", "in", property_ids)])
+    for model, ids in (
+        ("rental.visit", visit_ids),
+        ("rental.visit.slot", slot_ids),
+        ("rental.property", property_ids),
+        ("product.template", rpc("product.template", "search", like)),
+        ("rental.property.type", rpc("rental.property.type", "search", like)),
+    ):
+        if ids:
+            rpc(model, "unlink", ids)
+    # Los clientes creados por el portal quedan como contactos; se archivan
+    partner_ids = rpc("res.partner", "search", ["|", ("name", "=like", PREFIX + "%"),
+                                                ("email", "=like", "%@loadtest.invalid")])
+    if partner_ids:
+        rpc("res.partner", "write", partner_ids, {"active": False})
+    print("Limpieza: %s propiedades, %s franjas, %s visitas" % (len(property_ids), len(slot_ids), len(visit_ids)))
+
+
+# ---------------------------------------------------------------- Clientes
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+
+    def add(self, kind, latency, outcome):
+        with self.lock:
+            self.latencies[kind].append(latency)
+            self.outcomes[kind][outcome] += 1
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def classify(status, body):
+    lowered = body.lower()
+    if any(mark in lowered for mark in CONFLICT_MARKS):
+        return "conflict"
+    if status >= 400:
+        return "error"
+    if 'alert-danger' in body:
+        # Validaciones del formulario (p. ej. franja ya tomada): cuentan como conflicto
+        return "conflict"
+    return "ok"
+
+
+def client_loop(args, client_id, product_ids, slots, tz, stats, stop_at):
+    rng = random.Random(args.seed + client_id)
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+
+    def fetch(url, data=None):
+        start = time.perf_counter()
+        try:
+            resp = opener.open(url, data=data, timeout=args.timeout)
+            status, body = resp.status, resp.read().decode("utf-8", "replace")
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read().decode("utf-8", "replace")
+        except (urllib.error.URLError, ConnectionError, OSError) as e:
+            status, body = 599, str(e)
+        return status, body, time.perf_counter() - start
+
+    done = 0
+    while time.monotonic() < stop_at and (not args.requests or done < args.requests):
+        product_id = rng.choice(product_ids)
+        url = "%s/rental/agendar-visita/%s" % (args.url, product_id)
+        status, body, latency = fetch(url)
+        stats.add("GET", latency, classify(status, body))
+        done += 1
+
+        csrf = CSRF_RE.search(body)
+        offered = [int(s) for s in SLOT_RE.findall(body) if int(s) in slots]
+        if not (csrf and offered) or rng.random() >= args.post_ratio:
+            continue
+
+        # Visita de 30 min dentro de la franja, en la zona horaria del usuario público
+        slot_id = rng.choice(offered)
+        start, end = slots[slot_id]
+        halves = int((end - start).total_seconds() // 1800) - 1
+        visit_start = (start + timedelta(minutes=30 * rng.randint(0, max(halves, 0)))).astimezone(tz)
+        visit_end = visit_start + timedelta(minutes=30)
+        form = urllib.parse.urlencode({
+            "csrf_token": csrf.group(1),
+            "name": "%s cliente %s-%s" % (PREFIX, client_id, done),
+            "email": "cliente%s-%s@loadtest.invalid" % (client_id, done),
+            "phone": "0000",
+            "slot_id": slot_id,
+            "visit_start_time": visit_start.strftime("%H:%M"),
+            "visit_end_time": visit_end.strftime("%H:%M"),
+            "note": "",
+        }).encode()
+        status, body, latency = fetch(url, data=form)
+        outcome = classify(status, body)
+        if outcome == "ok" and SUCCESS_MARK not in body:
+            outcome = "error"
+        stats.add("POST", latency, outcome)
+        done += 1
+
+
+# ---------------------------------------------------------------- Informe
+def server_samples(rpc, since_id):
+    return rpc(
+        "rental.perf.sample", "search_read",
+        [("id", ">", since_id), ("operation", "=", OPERATION)],
+        fields=["duration_ms", "query_count", "query_time_ms"],
+    )
+
+
+def report(stats, elapsed, samples):
+    total = sum(len(v) for v in stats.latencies.values())
+    print()
+    print("Duración: %.1f s  Pedidos: %s  Rendimiento: %.1f req/s" % (elapsed, total, total / elapsed if elapsed else 0))
+    print()
+    print("%-5s %7s %9s %9s %9s %8s %9s" % ("tipo", "pedidos", "p50 ms", "p95 ms", "p99 ms", "errores", "conflict."))
+    for kind in ("GET", "POST"):
+        lat = [x * 1000.0 for x in stats.latencies.get(kind, [])]
+        if not lat:
+            continue
+        outcomes = stats.outcomes[kind]
+        print("%-5s %7s %9.1f %9.1f %9.1f %7.1f%% %8.1f%%" % (
+            kind, len(lat),
+            percentile(lat, 50), percentile(lat, 95), percentile(lat, 99),
+            100.0 * outcomes["error"] / len(lat),
+            100.0 * outcomes["conflict"] / len(lat),
+        ))
+    if samples:
+        queries = [s["query_count"] for s in samples]
+        duration = [s["duration_ms"] for s in samples]
+        sql_time = [s["query_time_ms"] for s in samples]
+        print()
+        print("Servidor (%s muestras de %s):" % (len(samples), OPERATION))
+        print("  consultas SQL por pedido: prom. %.1f  p95 %s  máx. %s" % (
+            sum(queries) / len(queries), percentile(queries, 95), max(queries)))
+        print("  tiempo servidor ms: p50 %.1f  p95 %.1f  p99 %.1f" % (
+            percentile(duration, 50), percentile(duration, 95), percentile(duration, 99)))
+        print("  tiempo SQL ms: prom. %.1f" % (sum(sql_time) / len(sql_time)))
+    else:
+        print("\nSin muestras del servidor (¿módulo sin rental.perf.sample?).")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8069")
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--login", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--clients", type=int, default=20, help="clientes concurrentes")
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos de carga")
+    parser.add_argument("--requests", type=int, default=0, help="tope de pedidos por cliente (0 = sin tope)")
+    parser.add_argument("--post-ratio", type=float, default=0.2, help="fracción de GET seguidos de un POST")
+    parser.add_argument("--properties", type=int, default=20)
+    parser.add_argument("--slots-per-property", type=int, default=12)
+    parser.add_argument("--agents", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-seed", action="store_true", help="usar los datos LOADTEST ya sembrados")
+    parser.add_argument("--cleanup", action="store_true", help="borrar los datos sembrados al terminar")
+    parser.add_argument("--odoo-bin", help="levantar este odoo-bin en lugar de usar un servidor existente")
+    parser.add_argument("--addons-path")
+    parser.add_argument("--db-host")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    server = spawn_odoo(args) if args.odoo_bin else None
+    try:
+        wait_for_server(args.url, timeout=300 if server else 10)
+        rpc = Rpc(args.url, args.db, args.login, args.password)
+
+        if args.no_seed:
+            product_ids = rpc("product.template", "search", [("name", "=like", PREFIX + "%")])
+            property_ids = rpc("rental.property", "search", [("name", "=like", PREFIX + "%")])
+            slot_rows = rpc("rental.visit.slot", "search_read", [("property_id", "in", property_ids)],
+                            fields=["start_datetime", "end_datetime"])
+            parse = lambda v: datetime.strptime(v, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+            slots = {r["id"]: (parse(r["start_datetime"]), parse(r["end_datetime"])) for r in slot_rows}
+        else:
+            product_ids, slots = seed(rpc, args.properties, args.slots_per_property, args.agents)
+        if not product_ids:
+            raise SystemExit("No hay productos LOADTEST; correr sin --no-seed.")
+
+        public = rpc("res.users", "search_read", [("login", "=", "public"), ("active", "=", False)],
+                     fields=["tz"], context={"active_test": False})
+        tz = ZoneInfo((public and public[0]["tz"]) or "UTC")
+
+        Param = "ir.config_parameter"
+        old_rate = rpc(Param, "get_param", SAMPLE_RATE_PARAM)
+        rpc(Param, "set_param", SAMPLE_RATE_PARAM, "1.0")
+        last = rpc("rental.perf.sample", "search", [], limit=1, order="id desc")
+        since_id = last[0] if last else 0
+
+        stats = Stats()
+        start = time.monotonic()
+        stop_at = start + args.duration
+        threads = [
+            threading.Thread(target=client_loop, args=(args, i, product_ids, slots, tz, stats, stop_at), daemon=True)
+            for i in range(args.clients)
+        ]
+        print("Carga: %s clientes, %.0f s, %.0f%% POST" % (args.clients, args.duration, args.post_ratio * 100))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - start
+
+        rpc(Param, "set_param", SAMPLE_RATE_PARAM, old_rate or "0")
+        report(stats, elapsed, server_samples(rpc, since_id))
+        if args.cleanup:
+            cleanup(rpc)
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,6 @@
-from . import invoice_report_wizard
\ No newline at end of file
+from . import csv_import_mixin
+from . import invoice_report_wizard
+from . import inventory_import_wizard
+from . import rent_indexation_wizard
+from . import owner_settlement_wizard
+from . import contract_import_wizard
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, _
+
+
+class RentalContractImportWizard(models.TransientModel):
+    _name = "rental.contract.import.wizard"
+    _inherit = ["rental.csv.import.mixin"]
+    _description = "Importar contratos desde CSV"
+
+    load_clauses = fields.Boolean(string="Cargar cláusulas por defecto", default=True)
+    contract_ids = fields.Many2many("rental.contract", string="Contratos creados", readonly=True)
+
+    def action_import(self):
+        self.ensure_one()
+        # La fila 1 es el encabezado
+        result = self.env["rental.contract"].import_contracts(
+            self._read_rows(["property", "tenant"]),
+            load_clauses=self.load_clauses,
+            skip_errors=self.skip_errors,
+            first_line=2,
+        )
+        errors = result["errors"]
+        if errors and not self.skip_errors:
+            self.write({
+                "result_message": _("No se importó nada: %s filas con errores.") % len(errors),
+                "error_log": "\n".join(errors),
+            })
+            return self._reopen()
+
+        self.write({
+            "state": "done",
+            "contract_ids": [(6, 0, result["contract_ids"])],
+            "result_message": _("Se crearon %(count)s contratos. Filas con error: %(err)s.") % {
+                "count": len(result["contract_ids"]),
+                "err": len(errors),
+            },
+            "error_log": "\n".join(errors),
+        })
+        return self._reopen()
+
+    def action_view_contracts(self):
+        self.ensure_one()
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Contratos importados"),
+            "res_model": "rental.contract",
+            "view_mode": "list,form",
+            "domain": [("id", "in", self.contract_ids.ids)],
+        }
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import base64
+import csv
+import io
+
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+# Clave con la cantidad de valores de más en una fila (más campos que el encabezado)
+EXTRA_COLUMNS_KEY = "__extra__"
+
+
+class RentalCsvImportMixin(models.AbstractModel):
+    """Campos y lectura de CSV comunes a los asistentes de importación."""
+    _name = "rental.csv.import.mixin"
+    _description = "Asistente de importación desde CSV"
+
+    data_file = fields.Binary(string="Archivo CSV", required=True)
+    filename = fields.Char(string="Nombre del archivo")
+    delimiter = fields.Selection(
+        [(",", "Coma (,)"), (";", "Punto y coma (;)")],
+        string="Separador",
+        default=",",
+        required=True,
+    )
+    skip_errors = fields.Boolean(
+        string="Importar filas válidas aunque haya errores",
+        help="Si no se marca, no se crea nada mientras exista alguna fila con error.",
+    )
+    state = fields.Selection([("draft", "Borrador"), ("done", "Procesado")], default="draft")
+    result_message = fields.Text(string="Resultado", readonly=True)
+    error_log = fields.Text(string="Errores por fila", readonly=True)
+
+    def _read_rows(self, required_columns):
+        """Filas del CSV como dicts con claves en minúsculas y valores recortados.
+
+        Una fila con más campos que el encabezado no corta la importación:
+        lleva en EXTRA_COLUMNS_KEY cuántos sobran y el validador la informa
+        como error de fila.
+        """
+        self.ensure_one()
+        content = base64.b64decode(self.data_file or b"")
+        try:
+            text = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            text = content.decode("latin-1")
+        reader = csv.DictReader(io.StringIO(text), delimiter=self.delimiter, restkey=EXTRA_COLUMNS_KEY)
+        headers = [(f or "").strip().lower() for f in reader.fieldnames or []]
+        if not set(required_columns) <= set(headers):
+            raise UserError(_("El CSV debe tener encabezado y al menos las columnas: %s.") % ", ".join(
+                "'%s'" % column for column in required_columns
+            ))
+        rows = []
+        for row in reader:
+            extra = row.pop(EXTRA_COLUMNS_KEY, None)
+            row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+            if extra:
+                row[EXTRA_COLUMNS_KEY] = len(extra)
+            rows.append(row)
+        return rows
+
+    def _reopen(self):
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+import base64
+import io
+import os
+import zipfile
+from datetime import datetime
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+
+from .csv_import_mixin import EXTRA_COLUMNS_KEY
+
+# Tamaño de lote para los create() de líneas
+LINE_BATCH_SIZE = 1000
+
+STATE_FIELDS = ("paint_state", "plumbing_state", "electrical_state")
+
+
+class RentalInventoryImportWizard(models.TransientModel):
+    _name = "rental.inventory.import.wizard"
+    _inherit = ["rental.csv.import.mixin"]
+    _description = "Importar inventarios desde CSV"
+
+    property_id = fields.Many2one(
+        "rental.property",
+        string="Propiedad",
+        help="Propiedad usada para las filas que no indican la columna 'property'.",
+    )
+    photos_file = fields.Binary(string="Fotos (ZIP)")
+    photos_filename = fields.Char(string="Nombre del ZIP")
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        ctx = self.env.context
+        if ctx.get("active_model") == "rental.property" and len(ctx.get("active_ids") or []) == 1:
+            res.setdefault("property_id", ctx["active_ids"][0])
+        return res
+
+    # --- Lectura de archivos
+    def _read_photos(self):
+        """Devuelve {nombre_de_archivo: bytes} con las fotos del ZIP (si hay)."""
+        self.ensure_one()
+        if not self.photos_file:
+            return {}
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(base64.b64decode(self.photos_file)))
+        except zipfile.BadZipFile:
+            raise UserError(_("El archivo de fotos no es un ZIP válido."))
+        photos = {}
+        with archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                photos[os.path.basename(info.filename).lower()] = archive.read(info)
+        return photos
+
+    # --- Validación en memoria
+    @staticmethod
+    def _parse_date(value):
+        for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+        return None
+
+    def _resolve_properties(self, rows):
+        """Resuelve la columna 'property' (id, código o nombre) con una sola búsqueda."""
+        keys = {r.get("property") for r in rows if r.get("property")}
+        if not keys:
+            return {}
+        # isdigit() acepta dígitos no ASCII ("²") que int() rechaza
+        ids = [int(k) for k in keys if k.isascii() and k.isdigit()]
+        domain = ["|", "|", ("code", "in", list(keys)), ("name", "in", list(keys)), ("id", "in", ids)]
+        matches = {}
+        for prop in self.env["rental.property"].search(domain):
+            for key in (str(prop.id), prop.code, prop.name):
+                if key in keys:
+                    matches.setdefault(key, set()).add(prop.id)
+        return matches
+
+    def _validate(self, rows, photos):
+        """Devuelve (grupos, errores). grupos: {(property_id, fecha): {"vals": ..., "lines": [...]}}"""
+        Line = self.env["rental.property.inventory.line"]
+        Inventory = self.env["rental.property.inventory"]
+        conditions = {}
+        for key, label in Line._fields["condition"].selection:
+            conditions[key] = key
+            conditions[label.lower()] = key
+        states = {}
+        for key, label in Inventory._fields["paint_state"].selection:
+            states[key] = key
+            states[label.lower()] = key
+
+        matches = self._resolve_properties(rows)
+        today = fields.Date.context_today(self)
+        groups = {}
+        errors = []
+
+        # La fila 1 es el encabezado
+        for lineno, row in enumerate(rows, start=2):
+            row_errors = []
+            if row.get(EXTRA_COLUMNS_KEY):
+                row_errors.append(_("%s valores de más respecto del encabezado") % row[EXTRA_COLUMNS_KEY])
+
+            prop_key = row.get("property")
+            if prop_key:
+                prop_ids = matches.get(prop_key, set())
+                if not prop_ids:
+                    row_errors.append(_("propiedad '%s' no encontrada") % prop_key)
+                elif len(prop_ids) > 1:
+                    row_errors.append(_("propiedad '%s' es ambigua") % prop_key)
+                property_id = next(iter(prop_ids)) if len(prop_ids) == 1 else False
+            else:
+                property_id = self.property_id.id
+                if not property_id:
+                    row_errors.append(_("falta la columna 'property'"))
+
+            inv_date = today
+            if row.get("date"):
+                inv_date = self._parse_date(row["date"])
+                if not inv_date:
+                    row_errors.append(_("fecha inválida '%s'") % row["date"])
+
+            name = row.get("item")
+            if not name:
+                row_errors.append(_("falta el ítem"))
+
+            quantity = 1.0
+            if row.get("quantity"):
+                try:
+                    quantity = float(row["quantity"].replace(",", "."))
+                except ValueError:
+                    row_errors.append(_("cantidad inválida '%s'") % row["quantity"])
+
+            condition = "good"
+            if row.get("condition"):
+                condition = conditions.get(row["condition"].lower())
+                if not condition:
+                    row_errors.append(_("condición inválida '%s'") % row["condition"])
+
+            image = False
+            if row.get("photo"):
+                data = photos.get(os.path.basename(row["photo"]).lower())
+                if data is None:
+                    row_errors.append(_("foto '%s' no está en el ZIP") % row["photo"])
+                else:
+                    image = base64.b64encode(data)
+
+            inv_vals = {}
+            for fname in STATE_FIELDS:
+                if row.get(fname):
+                    value = states.get(row[fname].lower())
+                    if not value:
+                        row_errors.append(_("valor inválido '%s' en %s") % (row[fname], fname))
+                    inv_vals[fname] = value
+            if row.get("note"):
+                inv_vals["note"] = row["note"]
+
+            if row_errors:
+                errors.append(_("Fila %s: %s") % (lineno, "; ".join(row_errors)))
+                continue
+
+            group = groups.setdefault((property_id, inv_date), {"vals": {}, "lines": []})
+            # Los datos del inventario se toman de la primera fila que los traiga
+            for key, value in inv_vals.items():
+                group["vals"].setdefault(key, value)
+            line_vals = {"name": name, "quantity": quantity, "condition": condition}
+            if image:
+                line_vals["image"] = image
+            group["lines"].append(line_vals)
+        return groups, errors
+
+    # --- Importación
+    def action_import(self):
+        self.ensure_one()
+        rows = self._read_rows(["item"])
+        groups, errors = self._validate(rows, self._read_photos())
+
+        if errors and not self.skip_errors:
+            self.write({
+                "result_message": _("No se importó nada: %s filas con errores.") % len(errors),
+                "error_log": "\n".join(errors),
+            })
+            return self._reopen()
+
+        inventories = self.env["rental.property.inventory"]
+        line_count = 0
+        if groups:
+            keys = list(groups)
+            inventories = inventories.create([
+                dict(groups[key]["vals"], property_id=key[0], date=key[1])
+                for key in keys
+            ])
+            line_vals_list = []
+            for key, inventory in zip(keys, inventories):
+                for vals in groups[key]["lines"]:
+                    vals["inventory_id"] = inventory.id
+                    line_vals_list.append(vals)
+            Line = self.env["rental.property.inventory.line"]
+            for batch in split_every(LINE_BATCH_SIZE, line_vals_list, list):
+                Line.create(batch)
+            line_count = len(line_vals_list)
+
+        self.write({
+            "state": "done",
+            "result_message": _("Se crearon %(inv)s inventarios con %(lines)s ítems. Filas con error: %(err)s.") % {
+                "inv": len(inventories),
+                "lines": line_count,
+                "err": len(errors),
+            },
+            "error_log": "\n".join(errors),
+        })
+        return self._reopen()
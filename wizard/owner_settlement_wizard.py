@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+
+class RentalOwnerSettlementWizard(models.TransientModel):
+    _name = "rental.owner.settlement.wizard"
+    _description = "Generar liquidaciones a propietarios"
+
+    # Por defecto, el mes anterior completo
+    date_from = fields.Date(
+        string="Desde", required=True,
+        default=lambda self: fields.Date.context_today(self).replace(day=1) - relativedelta(months=1),
+    )
+    date_to = fields.Date(
+        string="Hasta", required=True,
+        default=lambda self: fields.Date.context_today(self).replace(day=1) - relativedelta(days=1),
+    )
+    owner_ids = fields.Many2many(
+        "res.partner",
+        string="Propietarios",
+        help="Dejar vacío para liquidar a todos los propietarios con movimientos en el período.",
+    )
+    print_pdf = fields.Boolean(string="Imprimir PDF al generar")
+
+    def action_generate(self):
+        self.ensure_one()
+        settlements = self.env["rental.owner.settlement"]._generate(
+            self.date_from, self.date_to, self.owner_ids.ids or None
+        )
+        if not settlements:
+            raise UserError(_("No hay movimientos para liquidar en el período seleccionado."))
+        if self.print_pdf:
+            return settlements.action_print_pdf()
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Liquidaciones generadas"),
+            "res_model": "rental.owner.settlement",
+            "view_mode": "list,form",
+            "domain": [("id", "in", settlements.ids)],
+        }
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+
+class RentalRentIndexationWizard(models.TransientModel):
+    _name = "rental.rent.indexation.wizard"
+    _description = "Ajuste masivo de alquileres"
+
+    mode = fields.Selection(
+        [("percentage", "Porcentaje fijo"), ("index", "Índice")],
+        string="Ajustar por",
+        required=True,
+        default="percentage",
+    )
+    percentage = fields.Float("Variación (%)", digits=(6, 3))
+    index_id = fields.Many2one("rental.rent.index", "Índice")
+    rate = fields.Float("Variación aplicada (%)", compute="_compute_rate", digits=(6, 3))
+    effective_date = fields.Date(
+        "Fecha de vigencia",
+        required=True,
+        default=fields.Date.context_today,
+        help="Si es posterior a hoy, el nuevo monto se aplica ese día desde la tarea programada.",
+    )
+
+    # Filtros (si no se eligen contratos puntuales)
+    contract_ids = fields.Many2many("rental.contract", string="Contratos")
+    building_ids = fields.Many2many("rental.building", string="Edificios")
+    property_type_ids = fields.Many2many("rental.property.type", string="Tipos de Propiedad")
+    start_date_to = fields.Date(
+        "Iniciados hasta",
+        help="Solo contratos con fecha de inicio igual o anterior (p. ej. con un año cumplido).",
+    )
+
+    state = fields.Selection(
+        [("draft", "Filtros"), ("preview", "Vista previa"), ("done", "Aplicado")],
+        default="draft",
+    )
+    line_ids = fields.One2many("rental.rent.indexation.line", "wizard_id", string="Vista previa")
+    contract_count = fields.Integer("Contratos a ajustar", compute="_compute_totals")
+    total_old = fields.Float("Total actual", compute="_compute_totals")
+    total_new = fields.Float("Total ajustado", compute="_compute_totals")
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        ctx = self.env.context
+        if ctx.get("active_model") == "rental.contract" and ctx.get("active_ids"):
+            res["contract_ids"] = [(6, 0, ctx["active_ids"])]
+        return res
+
+    @api.depends("mode", "percentage", "index_id")
+    def _compute_rate(self):
+        for wiz in self:
+            wiz.rate = wiz.index_id.rate if wiz.mode == "index" else wiz.percentage
+
+    @api.depends("line_ids.old_amount", "line_ids.new_amount")
+    def _compute_totals(self):
+        for wiz in self:
+            wiz.contract_count = len(wiz.line_ids)
+            wiz.total_old = sum(wiz.line_ids.mapped("old_amount"))
+            wiz.total_new = sum(wiz.line_ids.mapped("new_amount"))
+
+    def _get_contracts(self):
+        self.ensure_one()
+        domain = [("state", "=", "active")]
+        if self.contract_ids:
+            domain.append(("id", "in", self.contract_ids.ids))
+        if self.building_ids:
+            domain.append(("property_id.building_id", "in", self.building_ids.ids))
+        if self.property_type_ids:
+            domain.append(("property_id.property_type_id", "in", self.property_type_ids.ids))
+        if self.start_date_to:
+            domain.append(("start_date", "<=", self.start_date_to))
+        return self.env["rental.contract"].search(domain)
+
+    def action_preview(self):
+        self.ensure_one()
+        if self.mode == "index" and not self.index_id:
+            raise UserError(_("Seleccioná el índice a aplicar."))
+        if not self.rate:
+            raise UserError(_("La variación no puede ser cero."))
+
+        contracts = self._get_contracts()
+        contracts.fetch(["rent_amount", "currency_id"])
+        factor = 1.0 + self.rate / 100.0
+        self.line_ids.unlink()
+        self.env["rental.rent.indexation.line"].create([
+            {
+                "wizard_id": self.id,
+                "contract_id": c.id,
+                "old_amount": c.rent_amount,
+                "new_amount": c.currency_id.round(c.rent_amount * factor),
+            }
+            for c in contracts
+        ])
+        self.state = "preview"
+        return self._reopen()
+
+    def action_back(self):
+        self.ensure_one()
+        self.line_ids.unlink()
+        self.state = "draft"
+        return self._reopen()
+
+    def action_apply(self):
+        self.ensure_one()
+        if self.state != "preview":
+            raise UserError(_("Este ajuste ya fue aplicado."))
+        lines = self.line_ids.filtered(lambda l: l.new_amount != l.old_amount)
+        if not lines:
+            raise UserError(_("No hay montos para ajustar."))
+
+        # La vista previa queda vieja si el contrato se ajustó o editó después de generarla
+        stale = lines.filtered(
+            lambda l: l.contract_id.state != "active"
+            or l.currency_id.compare_amounts(l.contract_id.rent_amount, l.old_amount)
+        )
+        if stale:
+            raise UserError(_(
+                "Estos contratos cambiaron desde la vista previa; volvé a generarla:\n%s"
+            ) % "\n".join(stale.contract_id.mapped("display_name")))
+
+        scheduled = self.effective_date > fields.Date.context_today(self)
+        adjustments = self.env["rental.rent.adjustment"].create([
+            {
+                "contract_id": line.contract_id.id,
+                "date": self.effective_date,
+                "old_amount": line.old_amount,
+                "new_amount": line.new_amount,
+                "rate": self.rate,
+                "index_id": self.index_id.id if self.mode == "index" else False,
+                "state": "pending" if scheduled else "applied",
+            }
+            for line in lines
+        ])
+        if not scheduled:
+            adjustments._apply_to_contracts()
+        self.state = "done"
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Contratos programados") if scheduled else _("Contratos ajustados"),
+            "res_model": "rental.contract",
+            "view_mode": "list,form",
+            "domain": [("id", "in", lines.contract_id.ids)],
+        }
+
+    def _reopen(self):
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+
+class RentalRentIndexationLine(models.TransientModel):
+    _name = "rental.rent.indexation.line"
+    _description = "Vista previa de ajuste de alquiler"
+
+    wizard_id = fields.Many2one("rental.rent.indexation.wizard", required=True, ondelete="cascade")
+    contract_id = fields.Many2one("rental.contract", "Contrato", required=True)
+    tenant_id = fields.Many2one(related="contract_id.tenant_id")
+    property_id = fields.Many2one(related="contract_id.property_id")
+    currency_id = fields.Many2one(related="contract_id.currency_id")
+    old_amount = fields.Monetary("Monto actual", currency_field="currency_id")
+    new_amount = fields.Monetary("Monto nuevo", currency_field="currency_id")